@@ -1,13 +1,318 @@
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import subprocess
 import os
 import asyncio
+import atexit
+import collections
+import contextlib
+import json
+import fnmatch
+import selectors
+import signal
 import sys
-import fcntl
+import threading
+import time
 import paramiko
 
 from loguru import logger
 
+# Bytes read from a pipe per wakeup
+READ_CHUNK_SIZE = 64 * 1024
+# Lines are collected for up to this long and then emitted together
+OUTPUT_FLUSH_INTERVAL = 0.05
+OUTPUT_MAX_PENDING_LINES = 1000
+# OpenSSH's default MaxSessions; further commands go over another connection
+MAX_SESSIONS_PER_CONNECTION = 10
+SSH_KEEPALIVE_INTERVAL = 30
+# Seconds to wait for a host to accept the TCP connection, send its banner
+# and authenticate; ConnectTimeout in ~/.ssh/config overrides it per host
+SSH_CONNECT_TIMEOUT = 15
+# Hosts run_fleet works on at once unless with_limits says otherwise
+FLEET_MAX_PARALLEL = 64
+# Streaming transfers move files in ranges of this size, this many at a time
+TRANSFER_CHUNK_SIZE = 8 * 1024 * 1024
+TRANSFER_WORKERS = 4
+
+
+def _crc32c(data: bytes, crc: int = 0) -> int:
+    # Imported here so that Cli works without google-crc32c until a transfer runs
+    import google_crc32c
+
+    return google_crc32c.extend(crc, data)
+
+
+class SSHPool:
+    """
+    Persistent SSH connections per host, shared by every Cli in the process.
+
+    Remote commands run as channels multiplexed over a host's connections;
+    a new connection is opened only when all of them have
+    MAX_SESSIONS_PER_CONNECTION channels open. Connections that dropped
+    are replaced on the next use. One SFTP session per host is kept open
+    for file transfers.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS_PER_CONNECTION):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._connections: Dict[str, List[paramiko.SSHClient]] = {}
+        # transport -> channels currently open on it
+        self._open_channels: Dict[paramiko.Transport, int] = {}
+        # Open SFTP sessions not checked out by anyone
+        self._idle_sftp: Dict[str, List[paramiko.SFTPClient]] = {}
+        self._connect_locks: Dict[str, threading.Lock] = {}
+        self._config: Optional[paramiko.SSHConfig] = None
+
+    @property
+    def config(self) -> paramiko.SSHConfig:
+        """~/.ssh/config, parsed once."""
+        with self._lock:
+            if self._config is None:
+                config = paramiko.SSHConfig()
+                try:
+                    with open(os.path.expanduser("~/.ssh/config")) as f:
+                        config.parse(f)
+                except Exception as e:
+                    logger.error(f"Failed to load SSH config: {e}")
+                self._config = config
+            return self._config
+
+    def hosts_matching(self, pattern: str) -> List[str]:
+        """Hosts named in ~/.ssh/config that match a shell-style pattern, e.g. "build-*"."""
+        return sorted(
+            name for name in self.config.get_hostnames()
+            if not any(c in name for c in "*?!") and fnmatch.fnmatchcase(name, pattern)
+        )
+
+    def _connect(self, hostname: str) -> paramiko.SSHClient:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+        # Try to load system host keys
+        try:
+            client.load_system_host_keys()
+        except Exception as e:
+            logger.error(f"Failed to load system host keys: {e}")
+
+        # Connect using SSH config
+        host_config = self.config.lookup(hostname)
+        timeout = float(host_config.get("connecttimeout", SSH_CONNECT_TIMEOUT))
+
+        # An unreachable or hung host fails on its own instead of blocking its caller
+        try:
+            client.connect(
+                hostname=host_config.get("hostname", hostname),
+                username=host_config.get("user"),
+                key_filename=host_config.get("identityfile", [None])[0],
+                port=int(host_config.get("port", 22)),
+                timeout=timeout,
+                banner_timeout=timeout,
+                auth_timeout=timeout,
+            )
+        except (OSError, paramiko.SSHException) as e:
+            client.close()
+            raise ConnectionError(f"Could not connect to {hostname} (timeout {timeout:g}s): {e}") from e
+        client.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
+        return client
+
+    def _live_connections(self, hostname: str) -> List[paramiko.SSHClient]:
+        # you are holding the lock
+        live = []
+        for client in self._connections.get(hostname, []):
+            transport = client.get_transport()
+            if transport is not None and transport.is_active():
+                live.append(client)
+            else:
+                self._open_channels.pop(transport, None)
+                client.close()
+        self._connections[hostname] = live
+        return live
+
+    def _host_lock(self, hostname: str) -> threading.Lock:
+        # Serializes connecting to one host, so concurrent callers share a new connection
+        with self._lock:
+            return self._connect_locks.setdefault(hostname, threading.Lock())
+
+    def _add_connection(self, hostname: str) -> paramiko.SSHClient:
+        client = self._connect(hostname)
+        with self._lock:
+            self._connections.setdefault(hostname, []).append(client)
+        return client
+
+    def client(self, hostname: str) -> paramiko.SSHClient:
+        """Return a connected client for `hostname`, connecting if there is none."""
+        with self._host_lock(hostname):
+            with self._lock:
+                live = self._live_connections(hostname)
+                if live:
+                    return live[0]
+            return self._add_connection(hostname)
+
+    def _reserve_channel(self, hostname: str) -> Optional[paramiko.Transport]:
+        # The least busy connection with a session to spare, if there is one
+        with self._lock:
+            transports = [
+                c.get_transport() for c in self._live_connections(hostname)
+                if self._open_channels.get(c.get_transport(), 0) < self.max_sessions
+            ]
+            if not transports:
+                return None
+            transport = min(transports, key=lambda t: self._open_channels.get(t, 0))
+            self._open_channels[transport] = self._open_channels.get(transport, 0) + 1
+            return transport
+
+    def exec_command(self, hostname: str, command: str) -> paramiko.Channel:
+        """
+        Start `command` on a channel of the least busy connection to `hostname`.
+
+        The caller passes the channel to release() once it is done with it.
+        """
+        transport = self._reserve(hostname)
+        try:
+            chan = transport.open_session()
+            chan.exec_command(command)
+        except Exception:
+            self._unreserve(transport)
+            raise
+        return chan
+
+    def _reserve(self, hostname: str) -> paramiko.Transport:
+        transport = self._reserve_channel(hostname)
+        while transport is None:
+            with self._host_lock(hostname):
+                transport = self._reserve_channel(hostname)
+                if transport is None:
+                    self._add_connection(hostname)
+                    transport = self._reserve_channel(hostname)
+        return transport
+
+    def _unreserve(self, transport: paramiko.Transport) -> None:
+        with self._lock:
+            if self._open_channels.get(transport):
+                self._open_channels[transport] -= 1
+
+    def release(self, chan: paramiko.Channel) -> None:
+        chan.close()
+        self._unreserve(chan.get_transport())
+
+    @contextlib.contextmanager
+    def sftp(self, hostname: str) -> Iterator[paramiko.SFTPClient]:
+        """
+        Check out an SFTP session to `hostname` for the duration of the block.
+
+        An SFTPClient can't be shared by threads, so every caller gets one of
+        its own. Sessions stay open and are handed out again afterwards, and
+        each one counts as a channel of its connection.
+        """
+        sftp = None
+        with self._lock:
+            idle = self._idle_sftp.setdefault(hostname, [])
+            while idle and sftp is None:
+                sftp = idle.pop()
+                if sftp.get_channel().closed:
+                    transport = sftp.get_channel().get_transport()
+                    if self._open_channels.get(transport):
+                        self._open_channels[transport] -= 1
+                    sftp = None
+        if sftp is None:
+            transport = self._reserve(hostname)
+            try:
+                sftp = paramiko.SFTPClient.from_transport(transport)
+            except Exception:
+                self._unreserve(transport)
+                raise
+
+        try:
+            yield sftp
+        finally:
+            if sftp.get_channel().closed:
+                self._unreserve(sftp.get_channel().get_transport())
+            else:
+                with self._lock:
+                    self._idle_sftp[hostname].append(sftp)
+
+    def close(self, hostname: Optional[str] = None) -> None:
+        with self._lock:
+            hosts = [hostname] if hostname else list(self._connections)
+            for host in hosts:
+                for sftp in self._idle_sftp.pop(host, []):
+                    sftp.close()
+                for client in self._connections.pop(host, []):
+                    self._open_channels.pop(client.get_transport(), None)
+                    client.close()
+
+
+ssh_pool = SSHPool()
+atexit.register(ssh_pool.close)
+
+
+@dataclass
+class Step:
+    name: str
+    cmd: str
+    deps: List[str] = field(default_factory=list)
+    # Share of a CPU and MiB of memory the step is expected to use
+    cpu: float = 1.0
+    mem_mb: int = 0
+
+
+@dataclass
+class StepResult:
+    name: str
+    # "ok", "failed", "skipped" (a dependency failed) or "cancelled" (fail-fast)
+    status: str
+    returncode: Optional[int] = None
+    # When its dependencies had all succeeded; it may then wait for resources
+    ready: Optional[float] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    @property
+    def waited(self) -> float:
+        if self.ready is None or self.start is None:
+            return 0.0
+        return self.start - self.ready
+
+
+@dataclass
+class HostResult:
+    host: str
+    returncode: Optional[int] = None
+    # The command that failed, or why the host could not be reached
+    error: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.returncode is None:
+            return "error"
+        return "ok" if self.returncode == 0 else "failed"
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+@dataclass
+class TransferResult:
+    path: str
+    size: int
+    # CRC32C of the whole file, as GCS computes it
+    crc32c: int
+    # Bytes that were already in place when the transfer resumed
+    resumed_from: int = 0
+
 
 class Cli:
     workdir: Optional[str] = None
@@ -15,6 +320,13 @@ class Cli:
     commands: List[str] = []
     remote_host: Optional[str] = None
     ssh_client: Optional[paramiko.SSHClient] = None
+    steps: Optional[Dict[str, Step]] = None
+    max_parallel: Optional[int] = None
+    cpu_limit: Optional[float] = None
+    mem_limit_mb: Optional[int] = None
+    step_results: Dict[str, StepResult] = {}
+    critical_path: List[str] = []
+    hosts: Optional[List[str]] = None
 
     def with_workdir(self, workdir: str) -> "Cli":
         self.workdir = workdir
@@ -28,56 +340,57 @@ class Cli:
         self.commands.append(cmd)
         return self
 
-    def with_remote_ssh(self, hostname: str) -> "Cli":
-        self.remote_host = hostname
-
-        # Setup SSH client
-        self.ssh_client = paramiko.SSHClient()
-        self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        # Try to load system host keys
-        try:
-            self.ssh_client.load_system_host_keys()
-        except Exception as e:
-            logger.error(f"Failed to load system host keys: {e}")
+    def with_step(
+        self,
+        name: str,
+        cmd: str,
+        deps: Optional[List[str]] = None,
+        cpu: float = 1.0,
+        mem_mb: int = 0,
+    ) -> "Cli":
+        if self.steps is None:
+            self.steps = {}
+        if name in self.steps:
+            raise ValueError(f"Duplicate step: {name}")
+        self.steps[name] = Step(name, cmd, list(deps or []), cpu, mem_mb)
+        return self
 
-        # Connect using SSH config
-        config = paramiko.SSHConfig()
-        try:
-            with open(os.path.expanduser("~/.ssh/config")) as f:
-                config.parse(f)
-        except Exception as e:
-            logger.error(f"Failed to load SSH config: {e}")
+    def with_limits(
+        self,
+        max_parallel: Optional[int] = None,
+        cpu: Optional[float] = None,
+        mem_mb: Optional[int] = None,
+    ) -> "Cli":
+        """Bound run_con and run_dag; max_parallel defaults to the CPU count, cpu and mem_mb to no limit."""
+        self.max_parallel = max_parallel
+        self.cpu_limit = cpu
+        self.mem_limit_mb = mem_mb
+        return self
 
-        host_config = config.lookup(hostname)
+    def with_hosts(self, hosts: List[str]) -> "Cli":
+        self.hosts = (self.hosts or []) + list(hosts)
+        return self
 
-        # Get connection details from SSH config
-        hostname = host_config.get("hostname", hostname)
-        username = host_config.get("user")
-        key_filename = host_config.get("identityfile", [None])[0]
-        port = int(host_config.get("port", 22))
+    def with_host_pattern(self, pattern: str) -> "Cli":
+        hosts = ssh_pool.hosts_matching(pattern)
+        if not hosts:
+            logger.error(f"No hosts in SSH config match {pattern}")
+        return self.with_hosts(hosts)
 
+    def with_remote_ssh(self, hostname: str) -> "Cli":
+        self.remote_host = hostname
         try:
-            self.ssh_client.connect(
-                hostname=hostname,
-                username=username,
-                key_filename=key_filename,
-                port=port,
-            )
+            self.ssh_client = ssh_pool.client(hostname)
         except Exception as e:
             logger.error(f"Failed to connect to {hostname}: {str(e)}")
-
         return self
 
     def read_file(self, filename: str) -> bytes:
         filepath = os.path.join(self.workdir, filename)
 
         if self.remote_host and self.ssh_client:
-            sftp = self.ssh_client.open_sftp()
-            with sftp.file(filepath, "rb") as f:
-                content = f.read()
-            sftp.close()
-            return content
+            with ssh_pool.sftp(self.remote_host) as sftp, sftp.file(filepath, "rb") as f:
+                return f.read()
         else:
             if not os.path.exists(filepath):
                 raise FileNotFoundError(f"File not found: {filepath}")
@@ -88,14 +401,247 @@ class Cli:
         filepath = os.path.join(self.workdir, filename)
 
         if self.remote_host and self.ssh_client:
-            sftp = self.ssh_client.open_sftp()
-            with sftp.file(filepath, "wb") as f:
+            with ssh_pool.sftp(self.remote_host) as sftp, sftp.file(filepath, "wb") as f:
                 f.write(content)
-            sftp.close()
         else:
             with open(filepath, "wb") as f:
                 f.write(content)
 
+    @contextlib.contextmanager
+    def _open(self, filepath: str, mode: str):
+        if not (self.remote_host and self.ssh_client):
+            with open(filepath, mode) as f:
+                yield f
+            return
+        with ssh_pool.sftp(self.remote_host) as sftp, sftp.open(filepath, mode) as f:
+            if "r" not in mode or "+" in mode:
+                # Don't wait for the reply to every 32 KiB write
+                f.set_pipelined(True)
+            yield f
+
+    def _stat(self, filepath: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime) of a file, or None if it doesn't exist."""
+        try:
+            if self.remote_host and self.ssh_client:
+                with ssh_pool.sftp(self.remote_host) as sftp:
+                    st = sftp.stat(filepath)
+            else:
+                st = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+        # SFTP only reports whole seconds
+        return st.st_size, int(st.st_mtime)
+
+    def _size(self, filepath: str) -> Optional[int]:
+        stat = self._stat(filepath)
+        return None if stat is None else stat[0]
+
+    def _rename(self, src: str, dst: str) -> None:
+        if self.remote_host and self.ssh_client:
+            with ssh_pool.sftp(self.remote_host) as sftp:
+                sftp.posix_rename(src, dst)
+        else:
+            os.replace(src, dst)
+
+    def _read_range(self, filepath: str, offset: int, length: int) -> bytes:
+        with self._open(filepath, "rb") as f:
+            if isinstance(f, paramiko.SFTPFile):
+                # Issues all of the range's read requests at once
+                return b"".join(f.readv([(offset, length)]))
+            f.seek(offset)
+            return f.read(length)
+
+    def _write_range(self, filepath: str, offset: int, data: bytes) -> int:
+        with self._open(filepath, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+        return offset + len(data)
+
+    @staticmethod
+    def _in_order(
+        fn: Callable, args: Iterable[Tuple], workers: int
+    ) -> Iterator:
+        """
+        Yield fn(*a) for every a in args, in order, with up to `workers` calls
+        running ahead. Memory stays bounded by `workers` results.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = collections.deque()
+            for a in args:
+                pending.append(pool.submit(fn, *a))
+                if len(pending) >= workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def iter_file(
+        self,
+        filename: str,
+        chunk_size: int = TRANSFER_CHUNK_SIZE,
+        offset: int = 0,
+        workers: int = TRANSFER_WORKERS,
+    ) -> Iterator[bytes]:
+        """
+        Yield the file from `offset` on in chunks of `chunk_size`.
+
+        Up to `workers` ranges are read ahead in parallel, so memory use is
+        about chunk_size * workers however large the file is.
+        """
+        filepath = os.path.join(self.workdir, filename)
+        size = self._size(filepath)
+        if size is None:
+            raise FileNotFoundError(f"File not found: {filepath}")
+        ranges = ((filepath, start, min(chunk_size, size - start)) for start in range(offset, size, chunk_size))
+        yield from self._in_order(self._read_range, ranges, workers)
+
+    def write_stream(self, filename: str, chunks: Iterable[bytes], offset: int = 0) -> TransferResult:
+        """
+        Write `chunks` to the file starting at `offset`, keeping what is before it.
+
+        Pass the size of a partly written file as `offset` to append the rest.
+        The returned size and CRC32C cover only the bytes written now.
+        """
+        filepath = os.path.join(self.workdir, filename)
+        crc = 0
+        written = 0
+        with self._open(filepath, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            for chunk in chunks:
+                f.write(chunk)
+                crc = _crc32c(chunk, crc)
+                written += len(chunk)
+        return TransferResult(filepath, written, crc, resumed_from=offset)
+
+    def download(
+        self,
+        filename: str,
+        local_path: str,
+        resume: bool = True,
+        chunk_size: int = TRANSFER_CHUNK_SIZE,
+        workers: int = TRANSFER_WORKERS,
+        expected_crc32c: Optional[int] = None,
+    ) -> TransferResult:
+        """
+        Copy a file of the (remote) workdir to `local_path` with constant memory.
+
+        Ranges are fetched in parallel but appended in order to
+        `<local_path>.part`, so after an interruption the part file is a
+        complete prefix. The source's size and mtime are recorded in
+        `<local_path>.part.json`; with `resume`, the next call continues from
+        the end of the part file if they still match, and starts over if not.
+
+        The part file replaces `local_path` only if the source didn't change
+        during the transfer and, when `expected_crc32c` is given, the CRC32C
+        of what arrived matches it. Otherwise the part file is removed and
+        IOError is raised.
+        """
+        filepath = os.path.join(self.workdir, filename)
+        part_path = f"{local_path}.part"
+        state_path = f"{part_path}.json"
+        source = self._stat(filepath)
+        if source is None:
+            raise FileNotFoundError(f"File not found: {filepath}")
+        state = {"source": filepath, "size": source[0], "mtime": source[1]}
+
+        offset = 0
+        if resume and os.path.exists(part_path) and os.path.exists(state_path):
+            with open(state_path) as f:
+                resumable = json.load(f) == state
+            if resumable and os.path.getsize(part_path) <= source[0]:
+                offset = os.path.getsize(part_path)
+        with open(state_path, "w") as f:
+            json.dump(state, f)
+
+        crc = 0
+        with open(part_path, "r+b" if offset else "wb") as f:
+            # The CRC covers the whole file, so fold in what is already here
+            while f.tell() < offset:
+                crc = _crc32c(f.read(min(chunk_size, offset - f.tell())), crc)
+            f.truncate(offset)
+            for chunk in self.iter_file(filename, chunk_size, offset, workers):
+                f.write(chunk)
+                crc = _crc32c(chunk, crc)
+            size = f.tell()
+
+        error = None
+        if self._stat(filepath) != source or size != source[0]:
+            error = f"{filepath} changed during the download"
+        elif expected_crc32c is not None and crc != expected_crc32c:
+            error = f"CRC32C mismatch for {filepath}: got {crc:08x}, expected {expected_crc32c:08x}"
+        if error:
+            os.unlink(part_path)
+            os.unlink(state_path)
+            raise IOError(error)
+
+        os.replace(part_path, local_path)
+        os.unlink(state_path)
+        return TransferResult(local_path, size, crc, resumed_from=offset)
+
+    def upload(
+        self,
+        local_path: str,
+        filename: str,
+        resume: bool = True,
+        chunk_size: int = TRANSFER_CHUNK_SIZE,
+        workers: int = TRANSFER_WORKERS,
+    ) -> TransferResult:
+        """
+        Copy `local_path` into the (remote) workdir with constant memory.
+
+        Up to `workers` ranges are written in parallel to `<filename>.part`,
+        which is renamed into place once complete. Ranges can finish out of
+        order, so the offset below which everything is written is recorded
+        in `<local_path>.upload`, with the local file's size and mtime. With
+        `resume`, the next call continues from there, unless the local file
+        changed since.
+        """
+        filepath = os.path.join(self.workdir, filename)
+        part_path = f"{filepath}.part"
+        state_path = f"{local_path}.upload"
+        local = os.stat(local_path)
+        size = local.st_size
+        state = {"path": filepath, "size": size, "mtime_ns": local.st_mtime_ns}
+
+        offset = 0
+        if resume and os.path.exists(state_path):
+            with open(state_path) as f:
+                saved = json.load(f)
+            part_size = self._size(part_path)
+            if (
+                {k: saved.get(k) for k in state} == state
+                and part_size is not None
+                and part_size >= saved["offset"]
+            ):
+                offset = saved["offset"]
+        if not offset:
+            with self._open(part_path, "wb"):
+                pass
+
+        crc = 0
+        with open(local_path, "rb") as f:
+            while f.tell() < offset:
+                crc = _crc32c(f.read(min(chunk_size, offset - f.tell())), crc)
+
+            def ranges():
+                nonlocal crc
+                for start in range(offset, size, chunk_size):
+                    data = f.read(chunk_size)
+                    crc = _crc32c(data, crc)
+                    yield part_path, start, data
+
+            for end in self._in_order(self._write_range, ranges(), workers):
+                with open(state_path, "w") as state_file:
+                    json.dump({**state, "offset": end}, state_file)
+
+        if os.stat(local_path).st_mtime_ns != local.st_mtime_ns:
+            os.unlink(state_path)
+            raise IOError(f"{local_path} changed during the upload")
+
+        self._rename(part_path, filepath)
+        if os.path.exists(state_path):
+            os.unlink(state_path)
+        return TransferResult(filepath, size, crc, resumed_from=offset)
+
     def _configure_logger(self):
         logger.remove()  # Remove any existing handlers
 
@@ -134,38 +680,70 @@ class Cli:
         self._configure_logger()
         return self
 
-    def _set_non_blocking(self, pipe):
-        fd = pipe.fileno()
-        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
-        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+    def _emit_lines(self, lines: List[str], is_stdout: bool, prefix: str = "") -> None:
+        # One logger call per batch, so the sink prints and flushes once
+        if not lines:
+            return
+        text = "\n".join(f"{prefix}{line}" for line in lines) if prefix else "\n".join(lines)
+        if is_stdout:
+            logger.bind(stdout=True).info(text)
+        else:
+            logger.bind(stderr=True).error(text)
+        lines.clear()
 
     def _process_output(self, proc: subprocess.Popen) -> None:
-        self._set_non_blocking(proc.stdout)
-        self._set_non_blocking(proc.stderr)
+        """
+        Relay the output of `proc` until both of its pipes are closed.
 
-        while proc.poll() is None:
-            try:
-                stdout_line = proc.stdout.readline() if proc.stdout else None
-                if stdout_line:
-                    logger.bind(stdout=True).info(stdout_line.decode().strip())
-            except (IOError, BlockingIOError):
-                pass
+        Sleeps in select() until a pipe has data, so a quiet build costs no
+        CPU. Lines are collected for up to OUTPUT_FLUSH_INTERVAL and emitted
+        together, which keeps chatty commands from flushing once per line.
+        """
+        selector = selectors.DefaultSelector()
+        partial = {}
+        pending = {}
+        for pipe, is_stdout in ((proc.stdout, True), (proc.stderr, False)):
+            if pipe is not None:
+                selector.register(pipe.fileno(), selectors.EVENT_READ, is_stdout)
+                partial[is_stdout] = b""
+                pending[is_stdout] = []
 
-            try:
-                stderr_line = proc.stderr.readline() if proc.stderr else None
-                if stderr_line:
-                    logger.bind(stderr=True).error(stderr_line.decode().strip())
-            except (IOError, BlockingIOError):
-                pass
+        last_flush = time.monotonic()
+        while selector.get_map():
+            has_pending = any(pending.values())
+            timeout = max(0.0, last_flush + OUTPUT_FLUSH_INTERVAL - time.monotonic()) if has_pending else None
 
-        # Read any remaining output
-        for line in proc.stdout:
-            logger.bind(stdout=True).info(line.decode().strip())
-        for line in proc.stderr:
-            logger.bind(stderr=True).error(line.decode().strip())
+            for key, _ in selector.select(timeout):
+                is_stdout = key.data
+                chunk = os.read(key.fd, READ_CHUNK_SIZE)
+                if not chunk:
+                    # EOF; a last line without a newline still counts
+                    selector.unregister(key.fd)
+                    if partial[is_stdout]:
+                        pending[is_stdout].append(partial[is_stdout].decode(errors="replace").rstrip())
+                        partial[is_stdout] = b""
+                    continue
 
-    async def _run_remote_cmd(self, cmd: str) -> None:
-        if not self.ssh_client:
+                *lines, partial[is_stdout] = (partial[is_stdout] + chunk).split(b"\n")
+                pending[is_stdout].extend(line.decode(errors="replace").rstrip() for line in lines)
+
+            now = time.monotonic()
+            if now - last_flush >= OUTPUT_FLUSH_INTERVAL or any(
+                len(lines) >= OUTPUT_MAX_PENDING_LINES for lines in pending.values()
+            ):
+                for is_stdout, lines in pending.items():
+                    self._emit_lines(lines, is_stdout)
+                last_flush = now
+
+        selector.close()
+        for is_stdout, lines in pending.items():
+            self._emit_lines(lines, is_stdout)
+        proc.wait()
+
+    async def _run_remote_cmd(self, cmd: str, host: Optional[str] = None) -> None:
+        # With an explicit host (fleet mode) the pool connects on demand and
+        # output lines are prefixed with the host
+        if host is None and not self.ssh_client:
             raise Exception("SSH client not initialized")
 
         # Prepare command with environment variables and working directory
@@ -177,25 +755,63 @@ class Cli:
             full_cmd += f"cd {self.workdir}; "
         full_cmd += cmd
 
-        stdin, stdout, stderr = self.ssh_client.exec_command(full_cmd)
-
-        async def read_output(stream, is_stdout=True):
-            while True:
-                line = await asyncio.to_thread(stream.readline)
-                if not line:
-                    break
-                if is_stdout:
-                    logger.bind(stdout=True).info(line.strip())
-                else:
-                    logger.bind(stderr=True).error(line.strip())
-
-        # Use asyncio.gather to wait for both streams
-        await asyncio.gather(read_output(stdout, True), read_output(stderr, False))
+        # One thread hop to start the command and one to collect its exit
+        # status; the output in between is read on the event loop
+        chan = await asyncio.to_thread(ssh_pool.exec_command, host or self.remote_host, full_cmd)
+        try:
+            await self._relay_channel(chan, f"[{host}] " if host else "")
+            exit_status = await asyncio.to_thread(chan.recv_exit_status)
+        except asyncio.CancelledError:
+            # Closing the channel ends the remote command
+            chan.close()
+            raise
+        finally:
+            ssh_pool.release(chan)
 
-        exit_status = stdout.channel.recv_exit_status()
         if exit_status != 0:
             raise subprocess.CalledProcessError(exit_status, cmd)
 
+    async def _relay_channel(self, chan: paramiko.Channel, prefix: str = "") -> None:
+        """
+        Relay the output of `chan` until the remote side sends EOF.
+
+        paramiko signals arriving data through chan.fileno(), so the channel
+        is watched by the event loop like a pipe. Each wakeup drains whatever
+        has arrived, in chunks of up to READ_CHUNK_SIZE, and emits the
+        complete lines of each stream with one logger call.
+        """
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+        partial = {True: b"", False: b""}
+        streams = (
+            (True, chan.recv_ready, chan.recv),
+            (False, chan.recv_stderr_ready, chan.recv_stderr),
+        )
+
+        def on_readable():
+            for is_stdout, ready, recv in streams:
+                lines = []
+                while ready():
+                    *complete, partial[is_stdout] = (partial[is_stdout] + recv(READ_CHUNK_SIZE)).split(b"\n")
+                    lines.extend(line.decode(errors="replace").rstrip() for line in complete)
+                self._emit_lines(lines, is_stdout, prefix)
+
+            # After EOF the fileno stays readable, so stop watching it
+            if (chan.eof_received or chan.closed) and not (chan.recv_ready() or chan.recv_stderr_ready()):
+                for is_stdout, _, _ in streams:
+                    if partial[is_stdout]:
+                        self._emit_lines([partial[is_stdout].decode(errors="replace").rstrip()], is_stdout, prefix)
+                        partial[is_stdout] = b""
+                if not finished.done():
+                    finished.set_result(None)
+
+        fd = chan.fileno()
+        loop.add_reader(fd, on_readable)
+        try:
+            await finished
+        finally:
+            loop.remove_reader(fd)
+
     def run_seq(self) -> None:
         if self.remote_host:
             for cmd in self.commands:
@@ -212,7 +828,7 @@ class Cli:
                 env=merged_env,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                bufsize=1,
+                bufsize=0,
                 universal_newlines=False,
             )
             self._process_output(proc)
@@ -233,6 +849,8 @@ class Cli:
             env=merged_env,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            # Own process group, so a cancelled command is killed with its children
+            start_new_session=True,
         )
 
         async def read_stream(stream, is_stdout=True):
@@ -245,21 +863,252 @@ class Cli:
                 else:
                     logger.bind(stderr=True).error(line.decode().strip())
 
-        await asyncio.gather(
-            read_stream(proc.stdout, True), read_stream(proc.stderr, False)
-        )
+        try:
+            await asyncio.gather(
+                read_stream(proc.stdout, True), read_stream(proc.stderr, False)
+            )
+            await proc.wait()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+            raise
 
-        await proc.wait()
         if proc.returncode != 0:
             raise subprocess.CalledProcessError(proc.returncode, cmd)
 
     def run_con(self) -> None:
         async def main():
-            tasks = [self._run_cmd_async(cmd) for cmd in self.commands]
-            await asyncio.gather(*tasks)
+            semaphore = asyncio.Semaphore(self.max_parallel or os.cpu_count() or 1)
+
+            async def run(cmd):
+                async with semaphore:
+                    await self._run_cmd_async(cmd)
+
+            await asyncio.gather(*(run(cmd) for cmd in self.commands))
 
         asyncio.run(main())
 
-    def __del__(self):
-        if self.ssh_client:
-            self.ssh_client.close()
+    def _dag_order(self) -> List[str]:
+        """Topological order of the steps; raises ValueError on unknown deps or cycles."""
+        steps = self.steps or {}
+        for step in steps.values():
+            for dep in step.deps:
+                if dep not in steps:
+                    raise ValueError(f"Step {step.name} depends on unknown step {dep}")
+
+        order = []
+        state = {}  # name -> "visiting" | "done"
+
+        def visit(name, chain):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(chain + [name])}")
+            state[name] = "visiting"
+            for dep in steps[name].deps:
+                visit(dep, chain + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in steps:
+            visit(name, [])
+        return order
+
+    def _dag_priorities(self, order: List[str]) -> Dict[str, int]:
+        # Steps heading the longest chain of dependents start first
+        dependents = {name: [] for name in order}
+        for name in order:
+            for dep in self.steps[name].deps:
+                dependents[dep].append(name)
+        height = {}
+        for name in reversed(order):
+            height[name] = 1 + max((height[d] for d in dependents[name]), default=0)
+        return height
+
+    def _dag_critical_path(self) -> List[str]:
+        """
+        The chain of steps that determined the wall time: from the last step
+        to finish, repeatedly to the dependency that finished last. Each step
+        on it contributes the time it waited for resources once its
+        dependencies were done, plus its run time.
+        """
+        finished = {n: r for n, r in self.step_results.items() if r.status in ("ok", "failed")}
+        if not finished:
+            return []
+        name = max(finished, key=lambda n: finished[n].end)
+        path = [name]
+        while True:
+            deps = [d for d in self.steps[name].deps if d in finished]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: finished[d].end)
+            path.append(name)
+        return path[::-1]
+
+    async def _run_dag(self, fail_fast: bool) -> None:
+        order = self._dag_order()
+        priority = self._dag_priorities(order)
+        max_parallel = self.max_parallel or os.cpu_count() or 1
+        cpu_limit = self.cpu_limit
+        mem_limit = self.mem_limit_mb
+        dag_start = time.monotonic()
+
+        pending = sorted(order, key=lambda n: -priority[n])
+        running: Dict[asyncio.Task, Step] = {}
+        cpu_used = 0.0
+        mem_used = 0
+        stopping = False
+
+        def fits(step):
+            if not running:
+                # A step bigger than the limits still runs, on its own
+                return True
+            if len(running) >= max_parallel:
+                return False
+            if cpu_limit is not None and cpu_used + step.cpu > cpu_limit:
+                return False
+            return mem_limit is None or mem_used + step.mem_mb <= mem_limit
+
+        while pending or running:
+            for name in list(pending):
+                if stopping:
+                    break
+                step = self.steps[name]
+                statuses = [self.step_results[d].status if d in self.step_results else None for d in step.deps]
+                if any(s in ("failed", "skipped", "cancelled") for s in statuses):
+                    pending.remove(name)
+                    self.step_results[name] = StepResult(name, "skipped")
+                    logger.bind(stderr=True).error(f"[{name}] skipped, a dependency did not succeed")
+                    continue
+                if any(s != "ok" for s in statuses) or not fits(step):
+                    continue
+                pending.remove(name)
+                cpu_used += step.cpu
+                mem_used += step.mem_mb
+                ready = max((self.step_results[d].end for d in step.deps), default=dag_start)
+                self.step_results[name] = StepResult(name, "running", ready=ready, start=time.monotonic())
+                logger.bind(stdout=True).info(f"[{name}] started: {step.cmd}")
+                running[asyncio.ensure_future(self._run_cmd_async(step.cmd))] = step
+
+            if stopping:
+                for name in pending:
+                    self.step_results[name] = StepResult(name, "cancelled")
+                pending.clear()
+                for task in running:
+                    task.cancel()
+            if not running:
+                continue
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step = running.pop(task)
+                cpu_used -= step.cpu
+                mem_used -= step.mem_mb
+                result = self.step_results[step.name]
+                result.end = time.monotonic()
+                if task.cancelled():
+                    result.status = "cancelled"
+                    continue
+                error = task.exception()
+                if error is None:
+                    result.status, result.returncode = "ok", 0
+                    logger.bind(stdout=True).info(f"[{step.name}] done in {result.duration:.1f}s")
+                    continue
+                result.status = "failed"
+                result.returncode = getattr(error, "returncode", None)
+                logger.bind(stderr=True).error(f"[{step.name}] failed after {result.duration:.1f}s: {error}")
+                if fail_fast:
+                    stopping = True
+
+    def run_dag(self, fail_fast: bool = True) -> Dict[str, StepResult]:
+        """
+        Run the steps added with with_step, each as soon as its dependencies
+        have succeeded and it fits within the limits set by with_limits.
+
+        With fail_fast, the first failure cancels everything still running;
+        otherwise only the steps depending on a failed one are skipped.
+        Results are kept in step_results and the chain of steps that
+        determined the wall time in critical_path. Raises the first
+        CalledProcessError if any step failed.
+        """
+        self.step_results = {}
+        start = time.monotonic()
+        try:
+            asyncio.run(self._run_dag(fail_fast))
+        finally:
+            self.critical_path = self._dag_critical_path()
+
+        if self.critical_path:
+            results = [self.step_results[n] for n in self.critical_path]
+            chain = " -> ".join(
+                f"{r.name} ({r.waited:.1f}s waiting + {r.duration:.1f}s)" if r.waited >= 0.05
+                else f"{r.name} ({r.duration:.1f}s)"
+                for r in results
+            )
+            logger.bind(stdout=True).info(
+                f"Critical path: {chain}; wall time {time.monotonic() - start:.1f}s"
+            )
+
+        failed = [r for r in self.step_results.values() if r.status == "failed"]
+        if failed:
+            first = min(failed, key=lambda r: r.end)
+            raise subprocess.CalledProcessError(first.returncode or 1, self.steps[first.name].cmd)
+        return self.step_results
+
+    async def _run_on_host(self, host: str, semaphore: asyncio.Semaphore) -> HostResult:
+        async with semaphore:
+            result = HostResult(host, start=time.monotonic())
+            try:
+                for cmd in self.commands:
+                    await self._run_remote_cmd(cmd, host)
+                result.returncode = 0
+            except subprocess.CalledProcessError as e:
+                result.returncode, result.error = e.returncode, e.cmd
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+                logger.bind(stderr=True).error(f"[{host}] {result.error}")
+            result.end = time.monotonic()
+            return result
+
+    def _log_fleet_results(self, results: List[HostResult]) -> None:
+        width = max(len("host"), *(len(r.host) for r in results))
+        rows = [f"{'host':<{width}}  {'status':<6}  {'exit':>4}  {'seconds':>7}  error"]
+        for r in results:
+            exit_code = "-" if r.returncode is None else str(r.returncode)
+            rows.append(
+                f"{r.host:<{width}}  {r.status:<6}  {exit_code:>4}  {r.duration:>7.1f}  {r.error or ''}".rstrip()
+            )
+        failed = sum(r.status != "ok" for r in results)
+        rows.append(f"{len(results) - failed}/{len(results)} hosts succeeded")
+        logger.bind(stdout=True).info("\n".join(rows))
+
+    def run_fleet(self) -> List[HostResult]:
+        """
+        Run the commands on every host added with with_hosts or with_host_pattern.
+
+        Each host runs the commands in order and stops at its first failure,
+        like run_seq. Up to max_parallel hosts (see with_limits, default
+        FLEET_MAX_PARALLEL) run at once over pooled connections, and their
+        output is prefixed with the host name. Failures don't stop other
+        hosts; check the returned results, one per host in the given order.
+        """
+        hosts = list(dict.fromkeys(self.hosts or []))
+        if not hosts:
+            return []
+        max_parallel = self.max_parallel or FLEET_MAX_PARALLEL
+
+        async def main():
+            # Connecting and opening channels block; give every host in
+            # flight a thread instead of sharing the small default executor
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=min(max_parallel, len(hosts))))
+            semaphore = asyncio.Semaphore(max_parallel)
+            return await asyncio.gather(*(self._run_on_host(host, semaphore) for host in hosts))
+
+        results = asyncio.run(main())
+        self._log_fleet_results(results)
+        return results
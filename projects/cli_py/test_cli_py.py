@@ -0,0 +1,168 @@
+import json
+import os
+import subprocess
+
+import google_crc32c
+import pytest
+
+from cli_py import Cli
+
+
+def test_run_dag_without_fail_fast_skips_only_dependents(tmp_path):
+    cli = (
+        Cli()
+        .with_workdir(str(tmp_path))
+        .with_limits(max_parallel=2)
+        .with_step("a", "touch a.txt")
+        .with_step("b", "exit 3", deps=["a"])
+        .with_step("c", "touch c.txt", deps=["b"])
+        .with_step("d", "sleep 0.3 && touch d.txt", deps=["a"])
+    )
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        cli.run_dag(fail_fast=False)
+
+    assert excinfo.value.returncode == 3
+    statuses = {name: r.status for name, r in cli.step_results.items()}
+    assert statuses == {"a": "ok", "b": "failed", "c": "skipped", "d": "ok"}
+    assert os.path.exists(tmp_path / "d.txt")
+    assert not os.path.exists(tmp_path / "c.txt")
+    # d finished last, right after a
+    assert cli.critical_path == ["a", "d"]
+
+
+def test_run_dag_fail_fast_cancels_running_and_pending_steps(tmp_path):
+    cli = (
+        Cli()
+        .with_workdir(str(tmp_path))
+        .with_limits(max_parallel=2)
+        .with_step("slow", "sleep 30 && touch slow.txt")
+        .with_step("after", "touch after.txt", deps=["slow"])
+        .with_step("broken", "exit 1")
+    )
+    with pytest.raises(subprocess.CalledProcessError):
+        cli.run_dag()
+
+    statuses = {name: r.status for name, r in cli.step_results.items()}
+    assert statuses == {"slow": "cancelled", "after": "cancelled", "broken": "failed"}
+    assert cli.step_results["slow"].duration < 10
+    assert not os.path.exists(tmp_path / "slow.txt")
+    assert cli.critical_path == ["broken"]
+
+
+def test_run_dag_critical_path_follows_the_last_dependency(tmp_path):
+    cli = (
+        Cli()
+        .with_workdir(str(tmp_path))
+        .with_limits(max_parallel=2)
+        .with_step("fast", "true")
+        .with_step("slow", "sleep 0.3")
+        .with_step("join", "true", deps=["fast", "slow"])
+    )
+    results = cli.run_dag()
+
+    assert all(r.status == "ok" for r in results.values())
+    assert cli.critical_path == ["slow", "join"]
+    assert results["join"].start >= results["slow"].end
+
+
+def _interrupt_at(monkeypatch, method, at):
+    """Make Cli.<method> fail for every range starting at or after `at`."""
+    original = getattr(Cli, method)
+
+    def interrupted(self, filepath, offset, *args):
+        if offset >= at:
+            raise ConnectionResetError("connection lost")
+        return original(self, filepath, offset, *args)
+
+    monkeypatch.setattr(Cli, method, interrupted)
+
+
+@pytest.fixture
+def transfer(tmp_path):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    return Cli().with_workdir(str(remote)), tmp_path
+
+
+def test_download_resumes_partial_transfer(transfer, monkeypatch):
+    cli, tmp_path = transfer
+    data = os.urandom(1000)
+    (tmp_path / "remote" / "src.bin").write_bytes(data)
+    local = str(tmp_path / "dst.bin")
+
+    with monkeypatch.context() as m:
+        _interrupt_at(m, "_read_range", 300)
+        with pytest.raises(ConnectionResetError):
+            cli.download("src.bin", local, chunk_size=100, workers=1)
+    assert os.path.getsize(f"{local}.part") == 300
+
+    result = cli.download("src.bin", local, chunk_size=100, workers=1, expected_crc32c=google_crc32c.value(data))
+    assert result.resumed_from == 300
+    assert result.crc32c == google_crc32c.value(data)
+    with open(local, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(f"{local}.part.json")
+
+
+def test_download_starts_over_when_source_changed(transfer, monkeypatch):
+    cli, tmp_path = transfer
+    source = tmp_path / "remote" / "src.bin"
+    source.write_bytes(os.urandom(1000))
+    local = str(tmp_path / "dst.bin")
+
+    with monkeypatch.context() as m:
+        _interrupt_at(m, "_read_range", 300)
+        with pytest.raises(ConnectionResetError):
+            cli.download("src.bin", local, chunk_size=100, workers=1)
+
+    data = os.urandom(1000)
+    source.write_bytes(data)
+    # Same size, so only the mtime (whole seconds over SFTP) tells them apart
+    st = os.stat(source)
+    os.utime(source, (st.st_atime, st.st_mtime + 10))
+
+    result = cli.download("src.bin", local, chunk_size=100, workers=1)
+    assert result.resumed_from == 0
+    with open(local, "rb") as f:
+        assert f.read() == data
+
+
+def test_upload_resumes_partial_transfer(transfer, monkeypatch):
+    cli, tmp_path = transfer
+    data = os.urandom(1000)
+    local = tmp_path / "src.bin"
+    local.write_bytes(data)
+
+    with monkeypatch.context() as m:
+        _interrupt_at(m, "_write_range", 300)
+        with pytest.raises(ConnectionResetError):
+            cli.upload(str(local), "dst.bin", chunk_size=100, workers=1)
+    with open(f"{local}.upload") as f:
+        assert json.load(f)["offset"] == 300
+
+    result = cli.upload(str(local), "dst.bin", chunk_size=100, workers=1)
+    assert result.resumed_from == 300
+    assert result.crc32c == google_crc32c.value(data)
+    assert (tmp_path / "remote" / "dst.bin").read_bytes() == data
+    assert not os.path.exists(f"{local}.upload")
+    assert not os.path.exists(tmp_path / "remote" / "dst.bin.part")
+
+
+def test_upload_starts_over_when_local_file_changed(transfer, monkeypatch):
+    cli, tmp_path = transfer
+    local = tmp_path / "src.bin"
+    local.write_bytes(os.urandom(1000))
+
+    with monkeypatch.context() as m:
+        _interrupt_at(m, "_write_range", 300)
+        with pytest.raises(ConnectionResetError):
+            cli.upload(str(local), "dst.bin", chunk_size=100, workers=1)
+
+    data = os.urandom(1000)
+    local.write_bytes(data)
+    st = os.stat(local)
+    os.utime(local, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    result = cli.upload(str(local), "dst.bin", chunk_size=100, workers=1)
+    assert result.resumed_from == 0
+    assert (tmp_path / "remote" / "dst.bin").read_bytes() == data
@@ -1,9 +1,18 @@
 import pyarrow as pa
 import pyarrow.ipc as ipc
+import argparse
+import contextlib
 import multiprocessing
+import multiprocessing.connection
 import os
+import resource
 import tempfile
 
+# tmpfs mount backing POSIX shared memory on Linux
+SHM_DIR = "/dev/shm"
+
+STREAM_SCHEMA = pa.schema([('numbers', pa.int64()), ('letters', pa.string())])
+
 def writer_process(file_path):
     # Create an Arrow table
     arrays = [
@@ -33,31 +42,178 @@ def reader_process(file_path):
     print(f"Number of rows: {reconstructed_table.num_rows}")
     print(f"Number of columns: {reconstructed_table.num_columns}")
 
-def main():
-    # Create a temporary file for IPC
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.arrow') as temp_file:
-        file_path = temp_file.name
-    
+def ipc_file_size(table, options=None):
+    # Dry run against a mock sink: only sizes are computed, no buffers are copied
+    sink = pa.MockOutputStream()
+    with ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.size()
+
+@contextlib.contextmanager
+def shm_segment(suffix='.arrow'):
+    """
+    Reserve a named shared-memory segment and unlink it on exit.
+
+    The segment is a file on the tmpfs behind /dev/shm, so writing and mapping
+    it never touches a disk. Falls back to the regular temp dir elsewhere.
+    """
+    shm_dir = SHM_DIR if os.path.isdir(SHM_DIR) else None
+    fd, shm_path = tempfile.mkstemp(suffix=suffix, prefix='duckdb_ipc_', dir=shm_dir)
+    os.close(fd)
+    try:
+        yield shm_path
+    finally:
+        # Readers that still hold a mapping keep their pages until they unmap
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(shm_path)
+
+def shm_writer_process(shm_path):
+    # Create an Arrow table
+    arrays = [
+        pa.array([1, 2, 3, 4, 5]),
+        pa.array(['a', 'b', 'c', 'd', 'e'])
+    ]
+    table = pa.table(arrays, names=['numbers', 'letters'])
+
+    # Size the segment exactly, then serialize straight into the mapping
+    with pa.create_memory_map(shm_path, ipc_file_size(table)) as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    print("Writer: Wrote table to shared memory")
+
+def shm_reader_process(shm_path):
+    # Buffers of the table point into the mapped segment, nothing is copied
+    with pa.memory_map(shm_path, 'r') as source:
+        reconstructed_table = ipc.open_file(source).read_all()
+
+        # Print the reconstructed table
+        print("Reader: Reconstructed Table:")
+        print(reconstructed_table)
+        print("\nReader: Table Details:")
+        print(f"Number of rows: {reconstructed_table.num_rows}")
+        print(f"Number of columns: {reconstructed_table.num_columns}")
+
+def produce_batches(num_batches, batch_rows):
+    # Batches are built lazily so only the one in flight is alive
+    for i in range(num_batches):
+        start = i * batch_rows
+        numbers = pa.array(range(start, start + batch_rows), type=pa.int64())
+        letters = pa.array([chr(ord('a') + n % 26) for n in range(start, start + batch_rows)])
+        yield pa.record_batch([numbers, letters], schema=STREAM_SCHEMA)
+
+def stream_writer_process(fifo_path, num_batches, batch_rows):
+    # Opening a FIFO for writing blocks until the reader opens the other end.
+    # Plain file objects are used because pa.OSFile seeks, which a FIFO can't
+    with open(fifo_path, 'wb') as sink:
+        with ipc.new_stream(sink, STREAM_SCHEMA) as writer:
+            for batch in produce_batches(num_batches, batch_rows):
+                # Blocks while the pipe is full, which throttles the producer
+                writer.write_batch(batch)
+
+    print(f"Writer: Streamed {num_batches} batches")
+
+def stream_reader_process(fifo_path):
+    num_batches = 0
+    num_rows = 0
+    # Buffered reads hide the short reads a pipe returns
+    with open(fifo_path, 'rb') as source:
+        reader = ipc.open_stream(source)
+        # Consume one batch at a time instead of read_all()
+        for batch in reader:
+            num_batches += 1
+            num_rows += batch.num_rows
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Reader: Consumed {num_batches} batches, {num_rows} rows")
+    print(f"Reader: Peak RSS {peak_rss_mb:.1f} MiB")
+
+def run_stream_pipeline(num_batches, batch_rows):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fifo_path = os.path.join(temp_dir, 'stream.arrows')
+        os.mkfifo(fifo_path)
+
+        writer = multiprocessing.Process(
+            target=stream_writer_process,
+            args=(fifo_path, num_batches, batch_rows),
+            name="stream-writer"
+        )
+        reader = multiprocessing.Process(
+            target=stream_reader_process,
+            args=(fifo_path,),
+            name="stream-reader"
+        )
+
+        # Both stages run at the same time, the pipe couples them
+        writer.start()
+        reader.start()
+
+        # A stage blocked opening the FIFO would wait forever for a peer that
+        # died, so watch both and stop the survivor when one of them fails
+        running = {writer.sentinel: writer, reader.sentinel: reader}
+        try:
+            while running:
+                for sentinel in multiprocessing.connection.wait(list(running)):
+                    process = running.pop(sentinel)
+                    process.join()
+                    if process.exitcode != 0:
+                        raise RuntimeError(f"{process.name} exited with code {process.exitcode}")
+        finally:
+            for process in (writer, reader):
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+def run_pipeline(writer_target, reader_target, path):
     # Create processes
     writer = multiprocessing.Process(
-        target=writer_process, 
-        args=(file_path,)
+        target=writer_target,
+        args=(path,)
     )
     reader = multiprocessing.Process(
-        target=reader_process, 
-        args=(file_path,)
+        target=reader_target,
+        args=(path,)
     )
-    
+
     # Start processes
     writer.start()
     writer.join()  # Wait for writer to finish
-    
+
     reader.start()
     reader.join()  # Wait for reader to finish
-    
+
+def main(transport='file', num_batches=100, batch_rows=10_000):
+    if transport == 'stream':
+        run_stream_pipeline(num_batches, batch_rows)
+        return
+
+    if transport == 'shm':
+        with shm_segment() as shm_path:
+            run_pipeline(shm_writer_process, shm_reader_process, shm_path)
+        return
+
+    # Create a temporary file for IPC
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.arrow') as temp_file:
+        file_path = temp_file.name
+
+    run_pipeline(writer_process, reader_process, file_path)
+
     # Clean up temporary file
     os.unlink(file_path)
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Arrow IPC between processes")
+    parser.add_argument(
+        "--transport", choices=["file", "shm", "stream"], default="file",
+        help="file: temp file on disk, shm: zero-copy shared-memory segment, "
+        "stream: record batches over a FIFO"
+    )
+    parser.add_argument(
+        "--num-batches", type=int, default=100, help="Batches sent in stream mode"
+    )
+    parser.add_argument(
+        "--batch-rows", type=int, default=10_000, help="Rows per batch in stream mode"
+    )
+    args = parser.parse_args()
+    main(args.transport, args.num_batches, args.batch_rows)
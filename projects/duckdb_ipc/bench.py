@@ -0,0 +1,268 @@
+import argparse
+import contextlib
+import csv
+import math
+import multiprocessing
+import os
+import pickle
+import resource
+import tempfile
+import time
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+from a import ipc_file_size, shm_segment
+
+COLUMN_TYPES = ["int", "float", "string", "struct"]
+CODECS = ["none", "lz4", "zstd"]
+
+
+def make_table(num_rows, column_type):
+    """Build a two-column table of the given column type."""
+    rng = np.random.default_rng(0)
+    if column_type == "int":
+        columns = [
+            pa.array(np.arange(num_rows, dtype=np.int64)),
+            pa.array(rng.integers(0, 1 << 31, num_rows, dtype=np.int64)),
+        ]
+    elif column_type == "float":
+        columns = [pa.array(rng.random(num_rows)), pa.array(rng.random(num_rows))]
+    elif column_type == "string":
+        values = rng.integers(0, 1 << 31, num_rows)
+        columns = [
+            pa.array(values.astype(str)),
+            pa.array(np.char.add("key_", (values % 1000).astype(str))),
+        ]
+    elif column_type == "struct":
+        # Same shape as duckdb_null_value/a.py: STRUCT(a, b, c STRUCT(d, e))
+        ints = [pa.array(rng.integers(0, 1000, num_rows, dtype=np.int32)) for _ in range(4)]
+        c = pa.StructArray.from_arrays(ints[2:], names=["d", "e"])
+        i = pa.StructArray.from_arrays([ints[0], ints[1], c], names=["a", "b", "c"])
+        columns = [pa.array(np.arange(num_rows, dtype=np.int64)), i]
+    else:
+        raise ValueError(f"Unknown column type: {column_type}")
+    return pa.table(columns, names=["x", "y"])
+
+
+def _write_options(codec):
+    return ipc.IpcWriteOptions(compression=None if codec == "none" else codec)
+
+
+def write_arrow_ipc(table, path, codec):
+    with pa.OSFile(path, "wb") as sink:
+        with ipc.new_file(sink, table.schema, options=_write_options(codec)) as writer:
+            writer.write_table(table)
+
+
+def read_arrow_ipc(path):
+    with pa.memory_map(path, "r") as source:
+        return ipc.open_file(source).read_all()
+
+
+def write_pickle(table, path, codec):
+    with open(path, "wb") as f:
+        pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def write_feather(table, path, codec):
+    feather.write_feather(table, path, compression="uncompressed" if codec == "none" else codec)
+
+
+def read_feather(path):
+    return feather.read_table(path, memory_map=True)
+
+
+def write_duckdb(table, path, codec):
+    conn = duckdb.connect(path)
+    conn.register("source_table", table)
+    conn.execute("CREATE TABLE data AS SELECT * FROM source_table")
+    conn.close()
+
+
+def read_duckdb(path):
+    conn = duckdb.connect(path, read_only=True)
+    table = conn.execute("SELECT * FROM data").to_arrow_table()
+    conn.close()
+    return table
+
+
+def write_shm(table, path, codec):
+    options = _write_options(codec)
+    with pa.create_memory_map(path, ipc_file_size(table, options)) as mm:
+        with ipc.new_file(mm, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+
+# name -> (writer, reader, supported codecs, needs shared memory)
+TRANSPORTS = {
+    "arrow_ipc": (write_arrow_ipc, read_arrow_ipc, CODECS, False),
+    "pickle": (write_pickle, read_pickle, ["none"], False),
+    "feather": (write_feather, read_feather, CODECS, False),
+    "duckdb": (write_duckdb, read_duckdb, ["none"], False),
+    "shm": (write_shm, read_arrow_ipc, CODECS, True),
+}
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _baseline_rss_mb(column_type):
+    """
+    Peak RSS once the imports and Arrow/NumPy's lazy set-up are done.
+
+    Stages report how far their peak rose above it, so the figure reflects
+    the handoff itself rather than the interpreter.
+    """
+    make_table(1, column_type)
+    return _peak_rss_mb()
+
+
+def _writer(transport, path, num_rows, column_type, codec, queue):
+    baseline_rss = _baseline_rss_mb(column_type)
+    write, _, _, _ = TRANSPORTS[transport]
+    table = make_table(num_rows, column_type)
+    start = time.perf_counter()
+    write(table, path, codec)
+    queue.put((time.perf_counter() - start, table.nbytes, _peak_rss_mb() - baseline_rss))
+
+
+def _reader(transport, path, column_type, queue):
+    baseline_rss = _baseline_rss_mb(column_type)
+    _, read, _, _ = TRANSPORTS[transport]
+    start = time.perf_counter()
+    table = read(path)
+    # Full validation walks offsets and string data, so mapped transports
+    # can't report a table whose pages were never faulted in
+    table.validate(full=True)
+    queue.put((time.perf_counter() - start, table.num_rows, _peak_rss_mb() - baseline_rss))
+
+
+def _run_stage(ctx, target, args, queue):
+    proc = ctx.Process(target=target, args=args + (queue,))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"{target.__name__} exited with {proc.exitcode}")
+    return queue.get()
+
+
+def _run_once(ctx, transport, path, num_rows, column_type, codec):
+    """One handoff; process start-up is excluded from the latency."""
+    queue = ctx.Queue()
+    write_s, nbytes, writer_rss = _run_stage(
+        ctx, _writer, (transport, path, num_rows, column_type, codec), queue
+    )
+    read_s, rows_read, reader_rss = _run_stage(ctx, _reader, (transport, path, column_type), queue)
+    if rows_read != num_rows:
+        raise RuntimeError(f"{transport} read {rows_read} of {num_rows} rows")
+    return write_s + read_s, nbytes, max(writer_rss, reader_rss)
+
+
+@contextlib.contextmanager
+def _temp_file():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # A fresh name: DuckDB refuses to open an existing empty file
+        yield os.path.join(temp_dir, "handoff.bench")
+
+
+def _temp_path(transport):
+    if TRANSPORTS[transport][3]:
+        return shm_segment(suffix=".arrow")
+    return _temp_file()
+
+
+def percentile(values, q):
+    """Nearest-rank percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_benchmark(transports, row_counts, column_types, codecs, repeat):
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for transport in transports:
+        supported = TRANSPORTS[transport][2]
+        for codec in [c for c in codecs if c in supported]:
+            for column_type in column_types:
+                for num_rows in row_counts:
+                    latencies = []
+                    peak_rss = 0.0
+                    for _ in range(repeat):
+                        with _temp_path(transport) as path:
+                            latency, nbytes, rss = _run_once(
+                                ctx, transport, path, num_rows, column_type, codec
+                            )
+                        latencies.append(latency)
+                        peak_rss = max(peak_rss, rss)
+
+                    p50 = percentile(latencies, 50)
+                    result = {
+                        "transport": transport,
+                        "codec": codec,
+                        "type": column_type,
+                        "rows": num_rows,
+                        "mb_per_s": nbytes / p50 / 1e6,
+                        "rows_per_s": num_rows / p50,
+                        "p50_ms": p50 * 1e3,
+                        "p99_ms": percentile(latencies, 99) * 1e3,
+                        "rss_delta_mb": peak_rss,
+                    }
+                    results.append(result)
+                    print_result(result)
+    return results
+
+
+RESULT_FIELDS = [
+    "transport", "codec", "type", "rows", "mb_per_s", "rows_per_s", "p50_ms", "p99_ms", "rss_delta_mb",
+]
+
+HEADER = (
+    f"{'transport':<10} {'codec':<5} {'type':<7} {'rows':>10} {'MB/s':>9} "
+    f"{'rows/s':>12} {'p50 ms':>9} {'p99 ms':>9} {'RSS +MB':>12}"
+)
+
+
+def print_result(r):
+    print(
+        f"{r['transport']:<10} {r['codec']:<5} {r['type']:<7} {r['rows']:>10} "
+        f"{r['mb_per_s']:>9.1f} {r['rows_per_s']:>12.0f} {r['p50_ms']:>9.2f} "
+        f"{r['p99_ms']:>9.2f} {r['rss_delta_mb']:>12.1f}",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process-to-process table handoff")
+    parser.add_argument("--transports", nargs="+", choices=list(TRANSPORTS), default=list(TRANSPORTS))
+    parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", choices=COLUMN_TYPES, default=COLUMN_TYPES)
+    parser.add_argument("--codecs", nargs="+", choices=CODECS, default=CODECS)
+    parser.add_argument("--repeat", type=int, default=5, help="Handoffs per configuration")
+    parser.add_argument("--csv", help="Also write the results to this CSV file")
+    args = parser.parse_args()
+    if not any(c in TRANSPORTS[t][2] for t in args.transports for c in args.codecs):
+        parser.error("none of the selected transports supports the selected codecs")
+
+    print(HEADER)
+    results = run_benchmark(args.transports, args.rows, args.types, args.codecs, args.repeat)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,33 @@
 import duckdb
 import pyarrow as pa
 import numpy as np
+import argparse
 import multiprocessing
 import tempfile
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
 
-def duckdb_high_throughput_ipc():
+DEFAULT_BATCH_ROWS = 100_000
+# A DuckDB memory size such as "4GB", "512 MiB" or "1.5G"
+MEMORY_LIMIT_PATTERN = re.compile(r"\d+(\.\d+)?\s*([KMGT]i?)?B?", re.IGNORECASE)
+
+def duckdb_high_throughput_ipc(num_rows=1_000_000, batch_rows=DEFAULT_BATCH_ROWS, threads=None):
     def writer_process(db_path):
         # Create connection
         conn = duckdb.connect(db_path)
         
-        # Create large dataset
-        integers = np.arange(1_000_000, dtype=np.int64)
-        floats = np.random.rand(1_000_000)
-        
-        # Create Arrow table
-        table = pa.table({
-            'integers': integers,
-            'floats': floats
-        })
-        
-        # Register table
-        conn.register('large_table', table)
+        # Stream generated chunks into the table instead of materializing
+        # the whole dataset in Python first
+        stats = bulk_load(
+            conn, 'data', generate_chunks(num_rows, batch_rows),
+            batch_rows=batch_rows, threads=threads
+        )
         
-        # Persist to database
-        conn.execute("CREATE TABLE data AS SELECT * FROM large_table")
-        
-        print("Data written to DuckDB")
+        print(f"Data written to DuckDB: {stats}")
         conn.close()
 
     def reader_process(db_path):
@@ -49,6 +50,8 @@ def duckdb_high_throughput_ipc():
     # Create temporary database file
     with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as temp_db:
         db_path = temp_db.name
+    # Only reserve the name: DuckDB rejects an existing empty file
+    os.unlink(db_path)
 
     # Create processes
     writer = multiprocessing.Process(
@@ -67,7 +70,418 @@ def duckdb_high_throughput_ipc():
     reader.join()
     
     # Cleanup
-    os.unlink(db_path)
+    for path in (db_path, db_path + '.wal'):
+        if os.path.exists(path):
+            os.unlink(path)
+
+class ReadWriteLock:
+    """
+    Cross-process reader/writer lock for a DuckDB file.
+
+    DuckDB lets several processes attach a file read-only, or one process
+    attach it read-write, never both. Waiting writers block new readers so
+    a steady stream of readers can't starve the writer.
+    """
+
+    def __init__(self, ctx):
+        self._cond = ctx.Condition()
+        self._readers = ctx.Value('i', 0, lock=False)
+        self._writer = ctx.Value('b', False, lock=False)
+        self._waiting_writers = ctx.Value('i', 0, lock=False)
+
+    def acquire_read(self):
+        with self._cond:
+            self._cond.wait_for(
+                lambda: not self._writer.value and self._waiting_writers.value == 0
+            )
+            self._readers.value += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers.value -= 1
+            if self._readers.value == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers.value += 1
+            self._cond.wait_for(
+                lambda: not self._writer.value and self._readers.value == 0
+            )
+            self._waiting_writers.value -= 1
+            self._writer.value = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer.value = False
+            self._cond.notify_all()
+
+
+class CommitLog:
+    """
+    Committed row watermark shared between the writer and its readers.
+
+    Rows below `committed` are durable in the database file; readers wait on
+    it instead of polling the table. A writer that fails finishes the log as
+    aborted, so readers fail too instead of waiting forever.
+    """
+
+    def __init__(self, ctx):
+        self._cond = ctx.Condition()
+        self._committed = ctx.Value('q', 0, lock=False)
+        self._finished = ctx.Value('b', False, lock=False)
+        self._aborted = ctx.Value('b', False, lock=False)
+
+    def publish(self, num_rows):
+        with self._cond:
+            self._committed.value += num_rows
+            self._cond.notify_all()
+
+    def finish(self, aborted=False):
+        with self._cond:
+            self._finished.value = True
+            self._aborted.value = aborted
+            self._cond.notify_all()
+
+    def wait_past(self, seen):
+        """
+        Block until rows past `seen` are committed; None once the writer is done.
+
+        Raises RuntimeError if the writer aborted.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._committed.value > seen or self._finished.value
+            )
+            if self._aborted.value:
+                raise RuntimeError("Writer aborted")
+            if self._committed.value > seen:
+                return self._committed.value
+            return None
+
+
+def make_chunk(start, num_rows):
+    return pa.table({
+        'integers': np.arange(start, start + num_rows, dtype=np.int64),
+        'floats': np.random.rand(num_rows)
+    })
+
+
+def generate_chunks(num_rows, chunk_rows):
+    for start in range(0, num_rows, chunk_rows):
+        yield from make_chunk(start, min(chunk_rows, num_rows - start)).to_batches()
+
+
+@dataclass
+class IngestStats:
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.rows} rows in {self.batches} batches, {self.seconds:.2f}s "
+            f"({self.rows_per_sec:,.0f} rows/s)"
+        )
+
+
+def rebatch(batches, batch_rows):
+    """Regroup record batches into tables of exactly `batch_rows` rows (the last may be short)."""
+    if batch_rows <= 0:
+        raise ValueError(f"batch_rows must be positive, got {batch_rows}")
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        offset = 0
+        while offset < batch.num_rows:
+            take = min(batch_rows - pending_rows, batch.num_rows - offset)
+            # Slices are zero-copy views into the incoming batch
+            pending.append(batch.slice(offset, take))
+            pending_rows += take
+            offset += take
+            if pending_rows == batch_rows:
+                yield pa.Table.from_batches(pending)
+                pending = []
+                pending_rows = 0
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+
+def bulk_load(
+    conn: duckdb.DuckDBPyConnection,
+    table_name: str,
+    batches: Union[pa.RecordBatchReader, Iterable[pa.RecordBatch]],
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    threads: Optional[int] = None,
+    memory_limit: Optional[str] = None,
+    schema: Optional[pa.Schema] = None,
+) -> IngestStats:
+    """
+    Stream record batches into a DuckDB table, creating it if needed.
+
+    Each batch is inserted and committed on its own, so DuckDB can flush it
+    to the file before the next one arrives and peak memory follows
+    `batch_rows` rather than the dataset size. A single CREATE TABLE AS over
+    a RecordBatchReader would keep the whole load in one transaction.
+
+    The table is created from `schema`, or the reader's schema, even when
+    no batches arrive; a plain iterable of batches needs `schema` for that.
+    """
+    if batch_rows <= 0:
+        raise ValueError(f"batch_rows must be positive, got {batch_rows}")
+    if memory_limit is not None and not MEMORY_LIMIT_PATTERN.fullmatch(memory_limit.strip()):
+        raise ValueError(f"memory_limit must be a size such as '4GB', got {memory_limit!r}")
+    if schema is None:
+        schema = getattr(batches, "schema", None)
+
+    # The settings only apply to this load; the caller's connection gets its own back
+    settings = {}
+    if threads is not None:
+        settings["threads"] = str(int(threads))
+    if memory_limit is not None:
+        settings["memory_limit"] = f"'{memory_limit.strip()}'"
+    previous = {
+        name: conn.execute(f"SELECT current_setting('{name}')").fetchone()[0] for name in settings
+    }
+    try:
+        for name, value in settings.items():
+            conn.execute(f"SET {name} = {value}")
+        return _ingest(conn, quote_identifier(table_name), batches, batch_rows, schema)
+    finally:
+        for name, value in previous.items():
+            # current_setting() rounds sizes for display, so a value that
+            # was the default is restored exactly with RESET
+            conn.execute(f"RESET {name}")
+            if conn.execute(f"SELECT current_setting('{name}')").fetchone()[0] != value:
+                conn.execute(f"SET {name} = '{value}'")
+
+
+def quote_identifier(name: str) -> str:
+    """Quote `name` as a DuckDB identifier, doubling any embedded quotes."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _ingest(conn, table, batches, batch_rows, schema):
+    stats = IngestStats(rows=0, batches=0, seconds=0.0)
+    start = time.perf_counter()
+    for chunk in rebatch(batches, batch_rows):
+        conn.register('_ingest_chunk', chunk)
+        try:
+            if stats.batches == 0:
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} AS '
+                    "SELECT * FROM _ingest_chunk LIMIT 0"
+                )
+            conn.execute(f'INSERT INTO {table} SELECT * FROM _ingest_chunk')
+        finally:
+            conn.unregister('_ingest_chunk')
+        stats.rows += chunk.num_rows
+        stats.batches += 1
+    if stats.batches == 0:
+        if schema is None:
+            raise ValueError(f"No batches to load into {table} and no schema to create it from")
+        conn.register('_ingest_chunk', schema.empty_table())
+        try:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM _ingest_chunk'
+            )
+        finally:
+            conn.unregister('_ingest_chunk')
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def coordinated_writer_process(db_path, rw_lock, commit_log, num_chunks, chunk_rows):
+    aborted = True
+    try:
+        for i in range(num_chunks):
+            # Build the chunk before taking the lock so readers aren't held up
+            chunk = make_chunk(i * chunk_rows, chunk_rows)
+
+            rw_lock.acquire_write()
+            try:
+                conn = duckdb.connect(db_path)
+                conn.register('chunk', chunk)
+                conn.execute("BEGIN TRANSACTION")
+                conn.execute("CREATE TABLE IF NOT EXISTS data AS SELECT * FROM chunk LIMIT 0")
+                conn.execute("INSERT INTO data SELECT * FROM chunk")
+                conn.execute("COMMIT")
+                # Fold the WAL into the main file so read-only attaches see it
+                conn.execute("CHECKPOINT")
+                conn.close()
+            finally:
+                rw_lock.release_write()
+
+            commit_log.publish(chunk.num_rows)
+        aborted = False
+    finally:
+        # Wake the readers either way; they fail if the writer did
+        commit_log.finish(aborted)
+    print(f"Writer: Committed {num_chunks} chunks of {chunk_rows} rows")
+
+
+def coordinated_reader_process(db_path, rw_lock, commit_log, reader_id):
+    seen = 0
+    while True:
+        committed = commit_log.wait_past(seen)
+        if committed is None:
+            break
+
+        rw_lock.acquire_read()
+        try:
+            conn = duckdb.connect(db_path, read_only=True)
+            # data is append-only, so rowid is the insertion order and a
+            # committed range never changes once published
+            new_rows = conn.execute(
+                "SELECT * FROM data WHERE rowid >= ? AND rowid < ?", [seen, committed]
+            ).to_arrow_table()
+            conn.close()
+        finally:
+            rw_lock.release_read()
+
+        print(f"Reader {reader_id}: rows [{seen}, {committed}) -> {new_rows.num_rows} new rows")
+        seen = committed
+
+    print(f"Reader {reader_id}: Done, saw {seen} rows")
+
+
+def duckdb_coordinated_ipc(num_chunks=10, chunk_rows=100_000, num_readers=2):
+    ctx = multiprocessing.get_context()
+    rw_lock = ReadWriteLock(ctx)
+    commit_log = CommitLog(ctx)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # The writer creates the file; DuckDB won't open an empty placeholder
+        db_path = os.path.join(temp_dir, 'data.db')
+
+        writer = ctx.Process(
+            target=coordinated_writer_process,
+            args=(db_path, rw_lock, commit_log, num_chunks, chunk_rows)
+        )
+        readers = [
+            ctx.Process(
+                target=coordinated_reader_process,
+                args=(db_path, rw_lock, commit_log, reader_id)
+            )
+            for reader_id in range(num_readers)
+        ]
+
+        writer.start()
+        for reader in readers:
+            reader.start()
+
+        writer.join()
+        for reader in readers:
+            reader.join()
+
+        failed = [p.name for p in [writer] + readers if p.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"Coordinated IPC failed in {', '.join(failed)}")
+
+
+# DuckDB stores tables in row groups of this many rows
+ROW_GROUP_SIZE = 122_880
+
+
+def split_row_ranges(num_rows, num_partitions, align=ROW_GROUP_SIZE):
+    """Split [0, num_rows) into at most `num_partitions` row-group aligned ranges."""
+    num_groups = max(1, -(-num_rows // align))
+    groups_per_partition = -(-num_groups // max(1, num_partitions))
+    step = groups_per_partition * align
+    return [(lo, min(lo + step, num_rows)) for lo in range(0, num_rows, step)]
+
+
+def _scan_range(db_path, sql, lo, hi):
+    # Each worker scans with one DuckDB thread; the pool supplies parallelism
+    conn = duckdb.connect(db_path, read_only=True, config={'threads': 1})
+    try:
+        return conn.execute(sql, [lo, hi]).to_arrow_table()
+    finally:
+        conn.close()
+
+
+def partitioned_scan(db_path, table_name, columns='*', where=None, num_workers=None):
+    """
+    Scan a table with a pool of read-only worker processes.
+
+    The table's rowid space is cut into row-group aligned ranges, each worker
+    runs the projection and filter over its own range, and the Arrow results
+    are concatenated in rowid order. Only row-wise queries (projections and
+    filters) can be split this way; aggregate on the merged table.
+    """
+    num_workers = num_workers or os.cpu_count()
+
+    conn = duckdb.connect(db_path, read_only=True)
+    # Append-only tables have dense rowids, so the upper bound is the row count
+    num_rows = conn.execute(f'SELECT COALESCE(MAX(rowid) + 1, 0) FROM {quote_identifier(table_name)}').fetchone()[0]
+    conn.close()
+
+    sql = f'SELECT {columns} FROM {quote_identifier(table_name)} WHERE rowid >= ? AND rowid < ?'
+    if where:
+        sql += f" AND ({where})"
+
+    ranges = split_row_ranges(num_rows, num_workers)
+    if not ranges:
+        return _scan_range(db_path, sql, 0, 0)
+
+    with ProcessPoolExecutor(max_workers=min(num_workers, len(ranges))) as pool:
+        futures = [pool.submit(_scan_range, db_path, sql, lo, hi) for lo, hi in ranges]
+        # Collect in submission order so the merged table keeps rowid order
+        return pa.concat_tables([f.result() for f in futures])
+
+
+def duckdb_partitioned_scan(num_rows=10_000_000, num_workers=None):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'data.db')
+
+        conn = duckdb.connect(db_path)
+        print(f"Loaded {bulk_load(conn, 'data', generate_chunks(num_rows, DEFAULT_BATCH_ROWS))}")
+        conn.close()
+
+        start = time.perf_counter()
+        conn = duckdb.connect(db_path, read_only=True)
+        single = conn.execute("SELECT * FROM data WHERE floats < 0.5").to_arrow_table()
+        conn.close()
+        single_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        merged = partitioned_scan(db_path, 'data', where="floats < 0.5", num_workers=num_workers)
+        partitioned_s = time.perf_counter() - start
+
+        assert merged.num_rows == single.num_rows
+        print(f"Single connection: {single.num_rows} rows in {single_s:.2f}s")
+        print(
+            f"Partitioned ({num_workers or os.cpu_count()} workers): "
+            f"{merged.num_rows} rows in {partitioned_s:.2f}s"
+        )
+
 
 if __name__ == '__main__':
-    duckdb_high_throughput_ipc()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="DuckDB file handoff between processes")
+    parser.add_argument(
+        "--mode", choices=["oneshot", "coordinated", "scan"], default="oneshot",
+        help="oneshot: single write racing a reader, coordinated: chunked commits "
+        "with readers following the committed watermark, scan: partitioned "
+        "parallel scan against a single-connection scan"
+    )
+    parser.add_argument("--num-chunks", type=int, default=10)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--num-readers", type=int, default=2)
+    parser.add_argument("--num-rows", type=int, default=1_000_000, help="Rows loaded in oneshot mode")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="Ingest batch size")
+    parser.add_argument("--threads", type=int, help="DuckDB threads used while loading")
+    parser.add_argument("--num-workers", type=int, help="Scan worker processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.batch_rows <= 0:
+        parser.error("--batch-rows must be positive")
+
+    if args.mode == "scan":
+        duckdb_partitioned_scan(args.num_rows, args.num_workers)
+    elif args.mode == "coordinated":
+        duckdb_coordinated_ipc(args.num_chunks, args.chunk_rows, args.num_readers)
+    else:
+        duckdb_high_throughput_ipc(args.num_rows, args.batch_rows, args.threads)
\ No newline at end of file
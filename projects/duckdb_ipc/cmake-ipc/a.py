@@ -1,6 +1,15 @@
+import os
+import subprocess
+
 import pyarrow as pa
 from pyarrow import fs
 import pandas as pd
+import pytest
+
+import library
+
+from ipc_reader import MappedIpcReader
+from ipc_writer import BatchedIpcWriter
 
 
 def test_read_from_file():
@@ -13,6 +22,16 @@ def test_read_from_file():
         print(df)
 
 
+def test_mapped_reader_reads_fixture():
+    file_path = "cmake-ipc/schema-valid.arrows"
+
+    with open(file_path, "rb") as f:
+        expected = pa.ipc.open_stream(f).read_all()
+    with MappedIpcReader(file_path) as reader:
+        assert reader.schema.equals(expected.schema)
+        assert reader.read_all().equals(expected)
+
+
 def get_table():
     df = pd.DataFrame({"a": [1, 2, 3], "b": [4.0, 5.0, 6.0]})
     df: pa.Table
@@ -34,11 +53,11 @@ def write_to_file_1(path, table):
 def write_to_file_3(path, table):
     BATCH_SIZE = 1
     NUM_BATCHES = 100
-    with pa.OSFile(path, "wb") as sink:
-        with pa.ipc.new_file(sink, table.schema) as writer:
-            for row in range(NUM_BATCHES):
-                batch = pa.record_batch(table.slice(row * BATCH_SIZE, BATCH_SIZE))
-                writer.write_batch(batch)
+    # Rows still arrive one at a time, but reach the file as a few large batches
+    with BatchedIpcWriter(path, table.schema, format="file") as writer:
+        for row in range(NUM_BATCHES):
+            writer.write_table(table.slice(row * BATCH_SIZE, BATCH_SIZE))
+    return writer.stats
 
 
 def test_write_to_file_1():
@@ -57,3 +76,152 @@ def _test_write_to_file_3():
     new_file = "cmake-ipc/schema-valid-new.arrows"
     df = get_table()
     write_to_file_3(new_file, df)
+
+
+def test_batched_writer_coalesces_single_rows(tmp_path):
+    path = str(tmp_path / "batched.arrow")
+    table = pa.table({"a": list(range(1000)), "b": [float(i) for i in range(1000)]})
+
+    with BatchedIpcWriter(path, table.schema, format="file", target_rows=256) as writer:
+        for row in range(table.num_rows):
+            writer.write_batch(table.slice(row, 1).to_batches()[0])
+
+    assert writer.stats.batches_in == 1000
+    assert writer.stats.batches_written == 4
+    reader = pa.ipc.open_file(path)
+    assert reader.num_record_batches == 4
+    assert reader.read_all().equals(table)
+
+
+@pytest.mark.parametrize("targets", [{"target_rows": 0}, {"target_bytes": 0}, {"target_rows": -1}])
+def test_batched_writer_rejects_non_positive_targets(tmp_path, targets):
+    schema = pa.schema([("a", pa.int64())])
+    with pytest.raises(ValueError, match="must be positive"):
+        BatchedIpcWriter(str(tmp_path / "batched.arrows"), schema, **targets)
+
+
+def _write_dictionary_rows(path, format, **kwargs):
+    schema = pa.schema([("key", pa.dictionary(pa.int32(), pa.string()))])
+    # Every single-row batch brings its own dictionary
+    with BatchedIpcWriter(path, schema, format=format, target_rows=4, **kwargs) as writer:
+        for key in "abcabcdd":
+            writer.write_rows([{"key": key}])
+    return writer
+
+
+def test_batched_writer_stream_compression_and_deltas(tmp_path):
+    path = str(tmp_path / "batched.arrows")
+    writer = _write_dictionary_rows(path, "stream", compression="zstd", emit_dictionary_deltas=True)
+
+    with pa.OSFile(path, "rb") as f:
+        reader = pa.ipc.open_stream(f)
+        table = reader.read_all()
+        stats = reader.stats
+    assert table.column("key").to_pylist() == list("abcabcdd")
+    assert writer.stats.batches_in == 8
+    assert writer.stats.batches_written == 2
+    assert stats.num_record_batches == 2
+    # "d" arrives as a delta on top of "abc" instead of a new dictionary
+    assert stats.num_dictionary_deltas == 1
+    assert stats.num_replaced_dictionaries == 0
+    assert writer.stats.bytes_written > 0
+    assert writer.stats.write_amplification > 0
+
+
+def test_batched_writer_file_dictionaries(tmp_path):
+    path = str(tmp_path / "batched.arrow")
+    writer = _write_dictionary_rows(path, "file")
+
+    reader = pa.ipc.open_file(path)
+    assert reader.num_record_batches == writer.stats.batches_written == 2
+    assert reader.read_all().column("key").to_pylist() == list("abcabcdd")
+
+
+def _write_batches(path, new_writer, num_batches=5):
+    schema = pa.schema([("a", pa.int64()), ("b", pa.string())])
+    with pa.OSFile(path, "wb") as sink:
+        with new_writer(sink, schema) as writer:
+            for i in range(num_batches):
+                writer.write_batch(
+                    pa.record_batch([pa.array([i, i]), pa.array([str(i), str(i)])], schema=schema)
+                )
+
+
+def test_mapped_reader_file_random_access(tmp_path):
+    path = str(tmp_path / "data.arrow")
+    _write_batches(path, pa.ipc.new_file)
+
+    with MappedIpcReader(path, columns=["b"]) as reader:
+        assert reader.is_file_format
+        assert reader.num_record_batches == 5
+        assert reader.schema.names == ["b"]
+        assert reader.get_batch(3).column(0).to_pylist() == ["3", "3"]
+        assert reader.get_batch(1).column(0).to_pylist() == ["1", "1"]
+
+
+def test_mapped_reader_stream_skips_forward(tmp_path):
+    path = str(tmp_path / "data.arrows")
+    _write_batches(path, pa.ipc.new_stream)
+
+    with MappedIpcReader(path, columns=["a"]) as reader:
+        assert not reader.is_file_format
+        assert reader.num_record_batches is None
+        assert reader.get_batch(4).column(0).to_pylist() == [4, 4]
+        assert reader.get_batch(0).column(0).to_pylist() == [0, 0]
+        assert reader.read_all().column("a").to_pylist() == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope="module")
+def built_library():
+    """Build the example_cmake_ipc_shared target unless it is already there."""
+    path = os.environ.get("EXAMPLE_CMAKE_IPC_LIBRARY", library.DEFAULT_LIBRARY_PATH)
+    if not os.path.exists(path):
+        build_dir = os.path.join(HERE, "build")
+        for cmd in (
+            ["cmake", "-S", HERE, "-B", build_dir],
+            ["cmake", "--build", build_dir, "--target", "example_cmake_ipc_shared"],
+        ):
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+            except FileNotFoundError:
+                pytest.skip("cmake is needed to build example_cmake_ipc_shared")
+            if result.returncode != 0:
+                pytest.skip(f"building example_cmake_ipc_shared failed: {result.stderr[-500:]}")
+    return library.load_library(path)
+
+
+def test_verify_files_reports_unreadable_files(tmp_path):
+    # The file is never mapped, so this runs without the C library
+    missing = str(tmp_path / "missing.arrow")
+    results = library.verify_files([missing, missing + "s"], lib=object())
+    assert list(results) == [missing, missing + "s"]
+    assert all(isinstance(error, FileNotFoundError) for error in results.values())
+
+
+def test_verify_fixtures(built_library):
+    results = library.verify_files(
+        [os.path.join(HERE, "schema-valid.arrows"), os.path.join(HERE, "invalid.arrows")]
+    )
+    valid, invalid = results.values()
+    assert valid == 1
+    assert isinstance(invalid, library.LibraryError)
+    assert "Expected 0xFFFFFFFF" in str(invalid)
+
+
+def test_verify_file_format_and_truncated_stream(built_library, tmp_path):
+    file_path = str(tmp_path / "data.arrow")
+    stream_path = str(tmp_path / "data.arrows")
+    _write_batches(file_path, pa.ipc.new_file, num_batches=3)
+    _write_batches(stream_path, pa.ipc.new_stream, num_batches=3)
+
+    # Schema message plus one message per batch
+    assert library.verify_file(file_path) == 4
+    assert library.verify_file(stream_path) == 4
+
+    with open(stream_path, "rb") as f:
+        data = f.read()
+    with pytest.raises(library.LibraryError, match="Truncated message"):
+        library.verify_buffer(data[:-16])
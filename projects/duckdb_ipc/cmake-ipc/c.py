@@ -2,6 +2,8 @@ import pandas as pd
 import pyarrow as pa
 from nanoarrow.c_array import allocate_c_array
 
+from library import consume_in_c, to_nanoarrow
+
 array = allocate_c_array()
 pa.array([1, 2, 3])._export_to_c(array._addr())
 
@@ -9,14 +11,15 @@ table = pa.Table.from_pandas(
     pd.DataFrame({"numbers": [1, 2, 3], "letters": ["a", "b", "c"]})
 )
 
-na_array = allocate_c_array()
-a = table.columns[0].combine_chunks()
-print(a)
-a._export_to_c(na_array._addr())
-print(na_array)
+# Two chunks per column, as tables read from IPC streams usually have
+table = pa.concat_tables([table, table])
+
+# Chunked columns cross the boundary as an ArrowArrayStream instead of
+# combine_chunks() + _export_to_c, so no chunk is copied
+for column in table.columns:
+    na_array = to_nanoarrow(column)
+    print(na_array)
 
-na_array = allocate_c_array()
-b = table.columns[1].combine_chunks()
-print(b)
-b._export_to_c(na_array._addr())
-print(na_array)
\ No newline at end of file
+# The whole table goes to the C consumer in library.c the same way
+n_chunks, n_rows = consume_in_c(table)
+print(f"library.c consumed {n_chunks} chunks, {n_rows} rows")
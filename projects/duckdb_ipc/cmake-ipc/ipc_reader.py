@@ -0,0 +1,92 @@
+import pyarrow as pa
+
+# An IPC file starts with "ARROW1" plus two bytes of padding; a stream doesn't
+FILE_MAGIC = b"ARROW1"
+
+
+class MappedIpcReader:
+    """
+    Lazy reader for .arrow (file) and .arrows (stream) IPC data.
+
+    The file is memory-mapped, and decoded batches reference the mapping
+    instead of copies, so only pages of the projected columns are ever
+    faulted in. File format batches are located through the footer and
+    read in any order. Stream format has no footer, so `get_batch` skips
+    forward message by message; skipped bodies are mapped but never read.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self._source = pa.memory_map(path, "r")
+        self.is_file_format = self._source.read(len(FILE_MAGIC)) == FILE_MAGIC
+        self._source.seek(0)
+
+        if self.is_file_format:
+            full_schema = pa.ipc.open_file(self._source).schema
+        else:
+            full_schema = self._open_stream_reader().schema
+        if columns is None:
+            self._options = pa.ipc.IpcReadOptions()
+        else:
+            # Unselected columns are not even decoded from the batch metadata
+            indices = [full_schema.get_field_index(name) for name in columns]
+            missing = [name for name, i in zip(columns, indices) if i < 0]
+            if missing:
+                raise KeyError(f"Columns not in {path}: {missing}")
+            self._options = pa.ipc.IpcReadOptions(included_fields=indices)
+
+        if self.is_file_format:
+            self._file_reader = pa.ipc.open_file(self._source, options=self._options)
+            self.schema = self._file_reader.schema
+        else:
+            self._rewind_stream()
+            self.schema = self._stream_reader.schema
+
+    def _open_stream_reader(self, options=None):
+        self._source.seek(0)
+        return pa.ipc.open_stream(self._source, options=options)
+
+    def _rewind_stream(self):
+        self._stream_reader = self._open_stream_reader(self._options)
+        self._stream_position = 0
+
+    @property
+    def num_record_batches(self):
+        """Batch count from the footer; None for streams, which would need a full scan."""
+        return self._file_reader.num_record_batches if self.is_file_format else None
+
+    def get_batch(self, i):
+        if self.is_file_format:
+            return self._file_reader.get_batch(i)
+
+        if i < self._stream_position:
+            # Streams only go forward; start over from the schema message
+            self._rewind_stream()
+        while self._stream_position < i:
+            self._stream_reader.read_next_batch()
+            self._stream_position += 1
+        batch = self._stream_reader.read_next_batch()
+        self._stream_position += 1
+        return batch
+
+    def iter_batches(self):
+        if self.is_file_format:
+            for i in range(self._file_reader.num_record_batches):
+                yield self._file_reader.get_batch(i)
+        else:
+            self._rewind_stream()
+            for batch in self._stream_reader:
+                self._stream_position += 1
+                yield batch
+
+    def read_all(self):
+        return pa.Table.from_batches(self.iter_batches(), schema=self.schema)
+
+    def close(self):
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
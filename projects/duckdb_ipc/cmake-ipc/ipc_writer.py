@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+@dataclass
+class WriteStats:
+    rows: int = 0
+    batches_in: int = 0
+    batches_written: int = 0
+    logical_bytes: int = 0
+    bytes_written: int = 0
+
+    @property
+    def write_amplification(self):
+        """Bytes on the wire per byte of Arrow data handed to the writer."""
+        return self.bytes_written / self.logical_bytes if self.logical_bytes else 0.0
+
+
+class BatchedIpcWriter:
+    """
+    IPC writer that coalesces small record batches before writing them.
+
+    Every IPC record batch carries its own flatbuffer header and 8-byte
+    aligned buffers, so writing rows one batch at a time spends more bytes on
+    metadata than on data. Incoming batches are buffered until `target_rows`
+    or `target_bytes` is reached and then written as one batch.
+
+    Works for the file (`pa.ipc.new_file`) and stream (`pa.ipc.new_stream`)
+    formats. `compression` is "lz4", "zstd" or None.
+
+    Incoming batches of a dictionary column may each carry their own
+    dictionary. The writer keeps one growing dictionary per column and
+    remaps every batch onto it, so a written batch only ever appends to the
+    previous dictionary. The stream format then sends either the new values
+    (`emit_dictionary_deltas`) or the whole dictionary again. The file
+    format allows no replacements, so it always writes deltas.
+    """
+
+    def __init__(
+        self,
+        sink,
+        schema,
+        format="stream",
+        target_rows=64 * 1024,
+        target_bytes=8 * 1024 * 1024,
+        compression=None,
+        emit_dictionary_deltas=False,
+    ):
+        if format not in ("file", "stream"):
+            raise ValueError(f"Unknown IPC format: {format}")
+        if target_rows <= 0 or target_bytes <= 0:
+            raise ValueError(
+                f"target_rows and target_bytes must be positive, got {target_rows} and {target_bytes}"
+            )
+        if format == "file":
+            # A file may only extend a field's dictionary, never replace it
+            emit_dictionary_deltas = True
+
+        self.schema = schema
+        self.target_rows = target_rows
+        self.target_bytes = target_bytes
+        self.stats = WriteStats()
+
+        self._owns_sink = isinstance(sink, str)
+        self._sink = pa.OSFile(sink, "wb") if self._owns_sink else sink
+        self._start = self._sink.tell()
+
+        options = pa.ipc.IpcWriteOptions(
+            compression=compression, emit_dictionary_deltas=emit_dictionary_deltas
+        )
+        new_writer = pa.ipc.new_file if format == "file" else pa.ipc.new_stream
+        self._writer = new_writer(self._sink, schema, options=options)
+
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+        # column index -> dictionary written so far, for dictionary columns
+        self._dictionaries = {
+            i: pa.array([], type=field.type.value_type)
+            for i, field in enumerate(schema)
+            if pa.types.is_dictionary(field.type)
+        }
+
+    def write_batch(self, batch):
+        if batch.num_rows == 0:
+            return
+        self.stats.batches_in += 1
+        self.stats.logical_bytes += batch.nbytes
+
+        offset = 0
+        while offset < batch.num_rows:
+            # Split oversized input so no written batch exceeds target_rows
+            piece = batch.slice(offset, self.target_rows - self._pending_rows)
+            offset += piece.num_rows
+            self._pending.append(piece)
+            self._pending_rows += piece.num_rows
+            self._pending_bytes += piece.nbytes
+            if self._pending_rows >= self.target_rows or self._pending_bytes >= self.target_bytes:
+                self.flush()
+
+    def write_table(self, table):
+        for batch in table.to_batches():
+            self.write_batch(batch)
+
+    def write_rows(self, rows):
+        """Append rows given as a list of dicts keyed by column name."""
+        self.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+
+    def _unify_dictionaries(self, batches):
+        """Remap the dictionary columns of `batches` onto the growing per-column dictionaries."""
+        if not self._dictionaries:
+            return batches
+        columns = [list(batch.columns) for batch in batches]
+        for i, known in self._dictionaries.items():
+            for batch_columns in columns:
+                values = batch_columns[i].dictionary
+                new_values = values.filter(pc.is_null(pc.index_in(values, value_set=known)))
+                if len(new_values):
+                    known = pa.concat_arrays([known, pc.unique(new_values)])
+            self._dictionaries[i] = known
+
+            index_type = self.schema.field(i).type.index_type
+            for batch_columns in columns:
+                column = batch_columns[i]
+                # Old code -> code in the unified dictionary
+                transpose = pc.index_in(column.dictionary, value_set=known)
+                indices = pc.take(transpose, column.indices).cast(index_type)
+                batch_columns[i] = pa.DictionaryArray.from_arrays(indices, known)
+        return [
+            pa.RecordBatch.from_arrays(batch_columns, schema=self.schema)
+            for batch_columns in columns
+        ]
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending = self._unify_dictionaries(self._pending)
+        if len(pending) == 1:
+            batch = pending[0]
+        else:
+            # One contiguous batch: a single header and one buffer per column
+            batch = pa.Table.from_batches(pending, schema=self.schema).combine_chunks().to_batches()[0]
+        self._writer.write_batch(batch)
+
+        self.stats.rows += batch.num_rows
+        self.stats.batches_written += 1
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        self.stats.bytes_written = self._sink.tell() - self._start
+        if self._owns_sink:
+            self._sink.close()
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,154 @@
+import ctypes
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import nanoarrow as na
+import pyarrow as pa
+
+# Built by the example_cmake_ipc_shared target in CMakeLists.txt
+DEFAULT_LIBRARY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "build", "libexample_cmake_ipc_shared.so"
+)
+
+# "ARROW1" padded to 8 bytes at the start of an IPC file, and unpadded at the end
+FILE_MAGIC = b"ARROW1"
+FILE_HEADER_SIZE = 8
+ERROR_SIZE = 1024
+
+
+class LibraryError(RuntimeError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def load_library(path=None):
+    path = path or os.environ.get("EXAMPLE_CMAKE_IPC_LIBRARY", DEFAULT_LIBRARY_PATH)
+    lib = ctypes.CDLL(path)
+
+    lib.my_library_last_error.restype = ctypes.c_char_p
+    lib.my_library_last_error.argtypes = []
+
+    lib.verify_ipc_message.restype = ctypes.c_int
+    lib.verify_ipc_message.argtypes = [ctypes.c_void_p, ctypes.c_int64]
+
+    lib.verify_ipc_stream.restype = ctypes.c_int
+    lib.verify_ipc_stream.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_int64,
+        ctypes.POINTER(ctypes.c_int64),
+        ctypes.c_char_p,
+        ctypes.c_int64,
+    ]
+
+    lib.consume_array_stream.restype = ctypes.c_int
+    lib.consume_array_stream.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_int64),
+        ctypes.POINTER(ctypes.c_int64),
+    ]
+    return lib
+
+
+def _check(lib, result):
+    if result != 0:
+        raise LibraryError(lib.my_library_last_error().decode(errors="replace"))
+
+
+def to_c_stream(obj):
+    """
+    Export any Arrow stream producer as a nanoarrow ArrowArrayStream.
+
+    Goes through the PyCapsule protocol (__arrow_c_stream__), so a pyarrow
+    Table or ChunkedArray is handed over chunk by chunk with its buffers in
+    place; nothing is combined or copied.
+    """
+    return na.c_array_stream(obj)
+
+
+def to_nanoarrow(obj):
+    """Wrap a pyarrow Table/ChunkedArray as a chunked nanoarrow Array, zero-copy."""
+    return na.Array(obj)
+
+
+def consume_in_c(obj, lib=None):
+    """Hand a stream to consume_array_stream() in library.c; returns (n_chunks, n_rows)."""
+    lib = lib or load_library()
+    stream = to_c_stream(obj)
+    n_chunks = ctypes.c_int64()
+    n_rows = ctypes.c_int64()
+    # The C side takes ownership and releases the stream when it is done
+    _check(lib, lib.consume_array_stream(stream._addr(), ctypes.byref(n_chunks), ctypes.byref(n_rows)))
+    return n_chunks.value, n_rows.value
+
+
+def _stream_region(buf):
+    """(offset, size) of the message stream inside an IPC stream or file buffer."""
+    if buf.size >= 2 * FILE_HEADER_SIZE and buf[: len(FILE_MAGIC)].to_pybytes() == FILE_MAGIC:
+        # File layout: magic, messages, footer, int32 footer length, magic
+        trailer = buf[buf.size - len(FILE_MAGIC) - 4 :].to_pybytes()
+        (footer_size,) = struct.unpack("<i", trailer[:4])
+        end = buf.size - len(FILE_MAGIC) - 4 - footer_size
+        if trailer[4:] != FILE_MAGIC or not FILE_HEADER_SIZE <= end <= buf.size:
+            raise LibraryError("Truncated IPC file: missing or corrupt footer")
+        return FILE_HEADER_SIZE, end - FILE_HEADER_SIZE
+    return 0, buf.size
+
+
+def verify_message(data, lib=None):
+    """Verify a single IPC message header with verify_ipc_message()."""
+    lib = lib or load_library()
+    buf = pa.py_buffer(data)
+    _check(lib, lib.verify_ipc_message(buf.address, buf.size))
+
+
+def verify_buffer(data, lib=None):
+    """
+    Verify every message in an IPC stream or file held in memory.
+
+    `data` is anything exposing the buffer protocol or a pa.Buffer; it is
+    passed to C by address, never copied. The GIL is released for the whole
+    call (ctypes does this for CDLL functions). Returns the message count.
+    """
+    lib = lib or load_library()
+    buf = data if isinstance(data, pa.Buffer) else pa.py_buffer(data)
+    offset, size = _stream_region(buf)
+
+    n_messages = ctypes.c_int64()
+    error = ctypes.create_string_buffer(ERROR_SIZE)
+    result = lib.verify_ipc_stream(
+        buf.address + offset, size, ctypes.byref(n_messages), error, ERROR_SIZE
+    )
+    if result != 0:
+        raise LibraryError(
+            f"Message {n_messages.value}: {error.value.decode(errors='replace')}"
+        )
+    return n_messages.value
+
+
+def verify_file(path, lib=None):
+    """Verify an .arrow or .arrows file through a read-only memory map."""
+    with pa.memory_map(path, "r") as source:
+        return verify_buffer(source.read_buffer(), lib)
+
+
+def verify_files(paths, max_workers=None, lib=None):
+    """
+    Verify many files in parallel; returns {path: message count or error}.
+
+    The error is a LibraryError for an invalid file and an OSError for one
+    that can't be opened or mapped; either way the other files are still
+    verified. Each worker thread spends its time inside C with the GIL
+    released, so throughput scales with threads up to the memory bandwidth.
+    """
+    lib = lib or load_library()
+
+    def verify(path):
+        try:
+            return verify_file(path, lib)
+        except (LibraryError, OSError) as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(paths, pool.map(verify, paths)))
@@ -16,6 +16,7 @@
 // under the License.
 
 #include <errno.h>
+#include <inttypes.h>
 #include <stdlib.h>
 
 #include <stdio.h>
@@ -24,6 +25,11 @@
 
 #include "library.h"
 
+// ENODATA is an XSI extension; match the fallback used by nanoarrow_ipc
+#if !defined(ENODATA)
+#define ENODATA 120
+#endif
+
 static struct ArrowError global_error;
 
 const char* my_library_last_error(void) { return ArrowErrorMessage(&global_error); }
@@ -41,3 +47,75 @@ int verify_ipc_message(const void* data, int64_t size_bytes) {
   return result;
 }
 
+int verify_ipc_stream(const void* data, int64_t size_bytes, int64_t* n_messages,
+                      char* error_message, int64_t error_size) {
+  struct ArrowError error;
+  error.message[0] = '\0';
+  *n_messages = 0;
+
+  struct ArrowIpcDecoder decoder;
+  ArrowIpcDecoderInit(&decoder);
+
+  const uint8_t* cursor = (const uint8_t*)data;
+  int64_t remaining = size_bytes;
+  int result = NANOARROW_OK;
+  while (remaining > 0) {
+    struct ArrowBufferView buffer_view;
+    buffer_view.data.data = cursor;
+    buffer_view.size_bytes = remaining;
+
+    result = ArrowIpcDecoderVerifyHeader(&decoder, buffer_view, &error);
+    if (result == ENODATA) {
+      // End-of-stream marker
+      result = NANOARROW_OK;
+      break;
+    }
+    if (result != NANOARROW_OK) {
+      break;
+    }
+
+    int64_t message_size = decoder.header_size_bytes + decoder.body_size_bytes;
+    if (message_size > remaining) {
+      ArrowErrorSet(&error,
+                    "Truncated message: needs %" PRId64 " bytes but only %" PRId64
+                    " remain",
+                    message_size, remaining);
+      result = EINVAL;
+      break;
+    }
+
+    cursor += message_size;
+    remaining -= message_size;
+    *n_messages += 1;
+  }
+
+  ArrowIpcDecoderReset(&decoder);
+
+  if (result != NANOARROW_OK && error_message != NULL && error_size > 0) {
+    snprintf(error_message, (size_t)error_size, "%s", error.message);
+  }
+  return result;
+}
+
+int consume_array_stream(struct ArrowArrayStream* stream, int64_t* n_chunks,
+                         int64_t* n_rows) {
+  *n_chunks = 0;
+  *n_rows = 0;
+
+  struct ArrowArray array;
+  int result;
+  while ((result = ArrowArrayStreamGetNext(stream, &array, &global_error)) ==
+         NANOARROW_OK) {
+    // A released array marks the end of the stream
+    if (array.release == NULL) {
+      break;
+    }
+
+    *n_chunks += 1;
+    *n_rows += array.length;
+    ArrowArrayRelease(&array);
+  }
+
+  ArrowArrayStreamRelease(stream);
+  return result;
+}
@@ -23,12 +23,27 @@
 extern "C" {
 #endif
 
+// Arrow C stream interface struct, defined in nanoarrow.h / abi.h
+struct ArrowArrayStream;
+
 // Get the last error message from a call to verify_ipc_message()
 const char* my_library_last_error(void);
 
 // Verifies an IPC message
 int verify_ipc_message(const void* data, int64_t size_bytes);
 
+// Verifies every message of an IPC stream laid out contiguously in memory,
+// stopping at the end-of-stream marker or the end of the buffer. Unlike
+// verify_ipc_message() it keeps no global state, so it can be called from
+// several threads at once; errors are written to error_message.
+int verify_ipc_stream(const void* data, int64_t size_bytes, int64_t* n_messages,
+                      char* error_message, int64_t error_size);
+
+// Pulls every chunk from an Arrow C stream, counting chunks and rows, then
+// releases the stream. Chunks are read in place; nothing is copied.
+int consume_array_stream(struct ArrowArrayStream* stream, int64_t* n_chunks,
+                         int64_t* n_rows);
+
 #ifdef __cplusplus
 }
 #endif
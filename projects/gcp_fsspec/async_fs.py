@@ -0,0 +1,173 @@
+import asyncio
+import os
+
+import fsspec
+import gcsfs
+from fsspec.asyn import AsyncFileSystem, sync
+
+from b import SymlinkCache, _generation
+
+
+class AsyncGCSSymlinkFileSystem(AsyncFileSystem):
+    """
+    Asynchronous variant of GCSSymlinkFileSystem built on gcsfs coroutines.
+
+    Symlinks are `.symlink` objects holding the target path, as in b.py. Every
+    component of a path is checked for a symlink concurrently, and lookups of
+    the same prefix made at the same time share one request, so thousands of
+    paths under one symlinked prefix resolve it once. fsspec generates the
+    blocking wrappers: `fs.cat([many paths])` runs `_cat_file` for all of them
+    in chunks of `batch_size` concurrent coroutines.
+    """
+
+    def __init__(
+        self,
+        bucket_name,
+        symlink_cache_ttl=60.0,
+        symlink_cache_size=10_000,
+        asynchronous=False,
+        loop=None,
+        batch_size=None,
+        gcs_fs=None,
+        **kwargs,
+    ):
+        """
+        Initialize the asynchronous GCS Symlink Filesystem.
+
+        Parameters:
+            bucket_name (str): The name of the GCS bucket.
+            symlink_cache_ttl (float): Seconds a symlink lookup is trusted before
+                it is revalidated against the object generation.
+            symlink_cache_size (int): Maximum number of cached symlink lookups.
+            asynchronous (bool): True when used from inside a running event loop.
+            loop: Event loop to run on; defaults to fsspec's IO loop.
+            batch_size (int): Maximum number of concurrent requests in bulk calls.
+            gcs_fs (AsyncFileSystem): Backend to use instead of a new
+                gcsfs.GCSFileSystem, e.g. fake_gcs.AsyncLatencyFileSystem.
+            **kwargs: Additional keyword arguments for gcsfs.GCSFileSystem.
+        """
+        super().__init__(asynchronous=asynchronous, loop=loop, batch_size=batch_size)
+        self.bucket = bucket_name
+        if gcs_fs is None:
+            # Same loop as ours, so its coroutines can be awaited directly
+            gcs_fs = gcsfs.GCSFileSystem(asynchronous=asynchronous, loop=self.loop, **kwargs)
+        self.gcs_fs = gcs_fs
+        self.symlink_cache = SymlinkCache(ttl=symlink_cache_ttl, maxsize=symlink_cache_size)
+        self._inflight = {}
+
+    def _symlink_path(self, path):
+        return f"{path.rstrip('/')}.symlink"
+
+    async def _fetch_symlink(self, path, cached):
+        symlink_blob = self._symlink_path(path)
+        try:
+            info = await self.gcs_fs._info(symlink_blob)
+        except FileNotFoundError:
+            self.symlink_cache.put(path, None)
+            return None
+
+        generation = _generation(info)
+        if cached is not SymlinkCache.MISSING and cached[0] is not None and cached[1] == generation:
+            self.symlink_cache.put(path, cached[0], generation)
+            return cached[0]
+
+        target = (await self.gcs_fs._cat_file(symlink_blob)).decode().strip()
+        self.symlink_cache.put(path, target, generation)
+        return target
+
+    async def _lookup_symlink(self, path):
+        """
+        Return the target of the symlink at `path`, or None if it is not one.
+        """
+        path = path.rstrip('/')
+        cached = self.symlink_cache.get(path)
+        if cached is not SymlinkCache.MISSING and cached[2]:
+            return cached[0]
+
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_symlink(path, cached))
+            self._inflight[path] = task
+            task.add_done_callback(lambda _: self._inflight.pop(path, None))
+        # One caller being cancelled must not cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def _resolve_path(self, path):
+        """
+        Resolve symlinks at any level of the path.
+
+        Parameters:
+            path (str): The path to resolve, starting with the bucket.
+
+        Returns:
+            str: The resolved path.
+        """
+        seen = set()
+        path = path.strip('/')
+        while True:
+            parts = path.split('/')
+            # The first component is the bucket, which can't be a symlink
+            candidates = ['/'.join(parts[:i]) for i in range(2, len(parts) + 1)]
+            targets = await asyncio.gather(*(self._lookup_symlink(c) for c in candidates))
+
+            # The shallowest symlink wins; anything below it is rewritten
+            for candidate, target in zip(candidates, targets):
+                if target is not None:
+                    break
+            else:
+                return path
+
+            if candidate in seen:
+                raise RecursionError(f"Circular symlink detected at {candidate}")
+            seen.add(candidate)
+
+            if not target.startswith('/'):
+                # Relative symlink; resolve relative to the symlink's directory
+                target = os.path.normpath(os.path.join(os.path.dirname(candidate), target))
+            path = target.strip('/') + path[len(candidate):]
+
+    async def _cat_file(self, path, start=None, end=None, **kwargs):
+        resolved_path = await self._resolve_path(path)
+        return await self.gcs_fs._cat_file(resolved_path, start=start, end=end, **kwargs)
+
+    async def _info(self, path, **kwargs):
+        resolved_path = await self._resolve_path(path)
+        return await self.gcs_fs._info(resolved_path, **kwargs)
+
+    async def _exists(self, path, **kwargs):
+        try:
+            resolved_path = await self._resolve_path(path)
+        except RecursionError:
+            return False
+        return await self.gcs_fs._exists(resolved_path, **kwargs)
+
+    async def _ls(self, path, detail=True, **kwargs):
+        resolved_path = await self._resolve_path(path)
+        entries, target = await asyncio.gather(
+            self.gcs_fs._ls(resolved_path + '/', detail=detail, **kwargs),
+            self._lookup_symlink(path.strip('/')),
+        )
+        if detail:
+            # Filter out symlink files
+            entries = [e for e in entries if not e['name'].endswith('.symlink')]
+        else:
+            entries = [e for e in entries if not e.endswith('.symlink')]
+
+        # If the original path was a symlink, include its target information
+        if target is not None:
+            entries.append(
+                {'name': f"{path} -> {target}", 'size': 0, 'type': 'symlink'}
+                if detail else f"{path} -> {target}"
+            )
+        return entries
+
+    def _open(self, path, mode='rb', **kwargs):
+        resolved_path = sync(self.loop, self._resolve_path, path)
+        return self.gcs_fs.open(resolved_path, mode, **kwargs)
+
+    def __repr__(self):
+        return f"AsyncGCSSymlinkFileSystem(bucket_name='{self.bucket}')"
+
+
+# Register the filesystem with fsspec
+fsspec.register_implementation("gcs_symlink_async", AsyncGCSSymlinkFileSystem)
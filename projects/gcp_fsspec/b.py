@@ -4,7 +4,74 @@ import fsspec
 from fsspec.spec import AbstractFileSystem
 from fsspec.utils import infer_storage_options
 import gcsfs
+import io
+import json
 import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class SymlinkCache:
+    """
+    Bounded LRU of symlink lookups with a TTL.
+
+    Maps a path to the target it links to, or to None when the path is known
+    not to be a symlink. Each entry remembers the generation of the
+    `.symlink` object it was read from, so an expired entry can be
+    revalidated with a metadata call instead of re-reading the blob.
+    """
+
+    # Returned by get() when the path has never been looked up
+    MISSING = object()
+
+    def __init__(self, ttl=60.0, maxsize=10_000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return (target, generation, fresh) or MISSING."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return self.MISSING
+            self._entries.move_to_end(path)
+            target, generation, expires_at = entry
+            return target, generation, time.monotonic() < expires_at
+
+    def put(self, path, target, generation=None, ttl=None):
+        with self._lock:
+            ttl = self.ttl if ttl is None else ttl
+            self._entries[path] = (target, generation, time.monotonic() + ttl)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def items(self):
+        """(path, target, generation) of every entry, fresh or not."""
+        with self._lock:
+            return [(path, target, generation) for path, (target, generation, _) in self._entries.items()]
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+
+def _generation(info):
+    # GCS reports an object generation; other backends fall back to etag/mtime
+    for key in ('generation', 'etag', 'mtime', 'updated', 'created'):
+        value = info.get(key)
+        if value is not None:
+            # Snapshots store generations as JSON; keep them equal after a reload
+            return value.isoformat() if isinstance(value, datetime) else value
+    return None
 
 class GCSSymlinkFileSystem(AbstractFileSystem):
     """
@@ -12,16 +79,45 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
     Symlinks are represented as files with a `.symlink` extension containing the target path.
     """
 
-    def __init__(self, bucket_name, **kwargs):
+    def __init__(self, bucket_name, symlink_cache_ttl=60.0, symlink_cache_size=10_000,
+                 cache_type='readahead', cache_options=None, gcs_fs=None, disk_cache=None,
+                 manifest_prefixes=(), manifest_handler=None, **kwargs):
         """
         Initialize the GCS Symlink Filesystem.
 
         Parameters:
             bucket_name (str): The name of the GCS bucket.
+            symlink_cache_ttl (float): Seconds a symlink lookup is trusted before
+                it is revalidated against the object generation.
+            symlink_cache_size (int): Maximum number of cached symlink lookups.
+            cache_type (str): Default fsspec cache for files opened for reading.
+                'readahead' suits sequential scans; 'blockcache' keeps an LRU of
+                fixed-size blocks for random access such as Parquet/Arrow
+                footers followed by column chunks.
+            cache_options (dict): Default options for the cache, e.g.
+                {'maxblocks': 32} for 'blockcache'.
+            gcs_fs (AbstractFileSystem): Backend to use instead of a new
+                gcsfs.GCSFileSystem, e.g. the in-memory fake in fake_gcs.py.
+            disk_cache (DiskCache): Node-local cache from disk_cache.py that
+                open() for reading and cat() go through.
+            manifest_prefixes (list): Bucket prefixes with a c.py symlink
+                manifest; symlink() and unlink() keep it up to date.
+            manifest_handler (GCSSymlinkHandler): Handler used to update the
+                manifests; a new one for the bucket by default.
             **kwargs: Additional keyword arguments for gcsfs.GCSFileSystem.
         """
         self.bucket = bucket_name
-        self.gcs_fs = gcsfs.GCSFileSystem(**kwargs)
+        self.cache_type = cache_type
+        self.cache_options = cache_options
+        self.disk_cache = disk_cache
+        self.gcs_fs = gcs_fs if gcs_fs is not None else gcsfs.GCSFileSystem(**kwargs)
+        self.symlink_cache = SymlinkCache(ttl=symlink_cache_ttl, maxsize=symlink_cache_size)
+        # Directories this instance has already created; mkdirs skips them
+        self._created_dirs = set()
+        # resolved path -> (generation, expiry), seeded by load_snapshot()
+        self._object_generations = {}
+        self.manifest_prefixes = [p.strip('/') for p in manifest_prefixes]
+        self._manifest_handler = manifest_handler
         super().__init__(root_marker='/')
 
     def _symlink_path(self, path):
@@ -30,44 +126,83 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
             path = path.rstrip('/')
         return f"{path}.symlink"
 
+    def _lookup_symlink(self, path, revalidate=False):
+        """
+        Return the target of the symlink at `path`, or None if it is not one.
+
+        Answers from the cache while the entry is fresh. An expired entry costs
+        one metadata call, plus a read only if the generation changed. With
+        `revalidate`, even a fresh entry is checked that way, for operations
+        that change the bucket and can't act on what another client changed.
+        """
+        path = path.rstrip('/')
+        cached = self.symlink_cache.get(path)
+        if cached is not SymlinkCache.MISSING:
+            target, generation, fresh = cached
+            if fresh and not revalidate:
+                return target
+
+        symlink_blob = self._symlink_path(path)
+        try:
+            info = self.gcs_fs.info(symlink_blob)
+        except FileNotFoundError:
+            self.symlink_cache.put(path, None)
+            return None
+
+        generation = _generation(info)
+        if cached is not SymlinkCache.MISSING and cached[0] is not None and cached[1] == generation:
+            # Unchanged since it was read; just extend its lifetime
+            self.symlink_cache.put(path, cached[0], generation)
+            return cached[0]
+
+        target = self.gcs_fs.cat_file(symlink_blob).decode().strip()
+        self.symlink_cache.put(path, target, generation)
+        return target
+
     def _is_symlink(self, path):
         """Check if a path is a symlink."""
-        symlink_blob = self._symlink_path(path)
-        return self.gcs_fs.exists(symlink_blob)
+        return self._lookup_symlink(path) is not None
 
     def _read_symlink(self, path):
         """Read the target path from a symlink."""
-        symlink_blob = self._symlink_path(path)
-        if not self.gcs_fs.exists(symlink_blob):
+        target = self._lookup_symlink(path)
+        if target is None:
             raise FileNotFoundError(f"Symlink {path} does not exist.")
-        with self.gcs_fs.open(symlink_blob, 'r') as f:
-            target = f.read().strip()
         return target
 
-    def _resolve_path(self, path, seen=None):
+    def _resolve_path(self, path, seen=None, revalidate=False):
         """
-        Resolve symlinks recursively.
+        Resolve symlinks recursively, in the path itself or any of its parents.
 
         Parameters:
             path (str): The path to resolve.
             seen (set): Set of already seen paths to detect circular symlinks.
+            revalidate (bool): Check cached lookups against the bucket, see
+                _lookup_symlink.
 
         Returns:
             str: The resolved path.
         """
         if seen is None:
             seen = set()
-        if path in seen:
-            raise RecursionError(f"Circular symlink detected at {path}")
-        seen.add(path)
 
-        if self._is_symlink(path):
-            target = self._read_symlink(path)
+        parts = path.rstrip('/').split('/')
+        # The bucket, the first non-empty component, can't be a symlink
+        first = 3 if path.startswith('/') else 2
+        for i in range(first, len(parts) + 1):
+            prefix = '/'.join(parts[:i])
+            target = self._lookup_symlink(prefix, revalidate)
+            if target is None:
+                continue
+
+            if prefix in seen:
+                raise RecursionError(f"Circular symlink detected at {prefix}")
+            seen.add(prefix)
             if not target.startswith('/'):
                 # Relative symlink; resolve relative to the symlink's directory
-                dir_path = os.path.dirname(path)
+                dir_path = os.path.dirname(prefix)
                 target = os.path.normpath(os.path.join(dir_path, target))
-            return self._resolve_path(target, seen)
+            return self._resolve_path('/'.join([target] + parts[i:]), seen, revalidate)
         return path
 
     def ls(self, path, detail=True, **kwargs):
@@ -92,8 +227,8 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
             blobs = [b for b in blobs if not b.endswith('.symlink')]
 
         # If the original path was a symlink, include its target information
-        if self._is_symlink(path.rstrip('/')):
-            target = self._read_symlink(path.rstrip('/'))
+        target = self._lookup_symlink(path)
+        if target is not None:
             symlink_info = {
                 'name': f"{path} -> {target}",
                 'size': 0,
@@ -123,6 +258,8 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
         Parameters:
             path (str): The file path to open.
             mode (str): The mode in which to open the file.
+            **kwargs: Passed to gcsfs; `cache_type`, `cache_options` and
+                `block_size` override the filesystem defaults for reads.
 
         Returns:
             file-like object: A file-like object for reading or writing.
@@ -133,8 +270,14 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
             if self._is_symlink(path):
                 print(f"Writing to symlink {path} -> {resolved_path}")
             return self.gcs_fs.open(resolved_path, mode, **kwargs)
+        elif self.disk_cache is not None:
+            f = self._cached_open(resolved_path)
+            return f if 'b' in mode else io.TextIOWrapper(io.BufferedReader(f))
         else:
             # Reading from the symlink target
+            kwargs.setdefault('cache_type', self.cache_type)
+            if self.cache_options is not None:
+                kwargs.setdefault('cache_options', self.cache_options)
             return self.gcs_fs.open(resolved_path, mode, **kwargs)
 
     def cat(self, path, **kwargs):
@@ -148,8 +291,101 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
             bytes or str: The contents of the file.
         """
         resolved_path = self._resolve_path(path)
+        if self.disk_cache is not None:
+            with self._cached_open(resolved_path) as f:
+                return f.read()
         return self.gcs_fs.cat(resolved_path, **kwargs)
 
+    def _cached_open(self, resolved_path, generation=None):
+        """
+        Open an object through the disk cache, downloading it on a miss.
+
+        Keyed by resolved path and generation, so a hit costs one metadata
+        request and an overwritten object is never served stale. With the
+        generation known from a snapshot, a hit costs no request at all.
+        Objects whose backend reports no version are read directly, uncached.
+        """
+        if generation is None:
+            pinned = self._object_generations.get(resolved_path)
+            if pinned is not None and time.monotonic() < pinned[1]:
+                generation = pinned[0]
+            else:
+                generation = _generation(self.gcs_fs.info(resolved_path))
+        if generation is None:
+            return io.BytesIO(self.gcs_fs.cat_file(resolved_path))
+
+        def fetch(f):
+            with self.gcs_fs.open(resolved_path, 'rb', cache_type='none', generation=generation) as src:
+                shutil.copyfileobj(src, f, 8 * 1024 * 1024)
+
+        return self.disk_cache.get_or_fetch(f"{resolved_path}#{generation}", fetch)
+
+    def prefetch(self, resolved_path, generation=None):
+        """
+        Download an object into the disk cache unless it is already there.
+
+        Parameters:
+            resolved_path (str): The object path, with symlinks resolved.
+            generation: Its generation, if already known from a listing.
+
+        Returns:
+            int: The size of the object; unversioned objects are not cached.
+        """
+        if generation is None:
+            info = self.gcs_fs.info(resolved_path)
+            generation = _generation(info)
+            if generation is None:
+                return info.get('size')
+        self._object_generations[resolved_path] = (generation, time.monotonic() + self.symlink_cache.ttl)
+        with self._cached_open(resolved_path, generation) as f:
+            return f.size
+
+    def snapshot(self):
+        """
+        Capture what this instance knows about symlinks and object generations.
+
+        Returns:
+            dict: JSON-serializable state for load_snapshot().
+        """
+        now = time.monotonic()
+        return {
+            'bucket': self.bucket,
+            'created': time.time(),
+            'ttl': self.symlink_cache.ttl,
+            'symlinks': [list(entry) for entry in self.symlink_cache.items()],
+            'objects': {p: g for p, (g, expires_at) in self._object_generations.items() if now < expires_at},
+        }
+
+    def save_snapshot(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f)
+
+    def load_snapshot(self, snapshot, ttl=None):
+        """
+        Seed the symlink and generation caches, e.g. from a warmup run.
+
+        Until the entries expire, resolving the snapshotted paths and reading
+        them from the disk cache needs no requests.
+
+        Parameters:
+            snapshot (dict or str): A snapshot() dict or a file written by save_snapshot().
+            ttl (float): Seconds to trust the snapshot; defaults to what is left
+                of the TTL it was taken with.
+
+        Returns:
+            None
+        """
+        if isinstance(snapshot, str):
+            with open(snapshot) as f:
+                snapshot = json.load(f)
+        if ttl is None:
+            ttl = snapshot.get('ttl', self.symlink_cache.ttl) - (time.time() - snapshot['created'])
+        for path, target, generation in snapshot['symlinks']:
+            self.symlink_cache.put(path, target, generation, ttl=ttl)
+        expires_at = time.monotonic() + ttl
+        for path, generation in snapshot['objects'].items():
+            self._object_generations[path] = (generation, expires_at)
+
     def exists(self, path):
         """
         Check if a path exists, considering symlinks.
@@ -193,14 +429,33 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
         Returns:
             None
         """
-        # Similar to makedir in GCS. Ensure all prefixes exist.
+        # Directories are implied by object prefixes, so one placeholder at the
+        # deepest level makes every ancestor visible too. No per-level exists
+        # checks, and nothing at all for directories created before.
+        path = path.rstrip('/')
+        if not exist_ok and (path in self._created_dirs or self.gcs_fs.exists(path + '/')):
+            raise FileExistsError(f"Directory {path}/ already exists.")
+        if path in self._created_dirs:
+            return
+        self.gcs_fs.touch(path + '/', **kwargs)
         parts = path.split('/')
-        for i in range(1, len(parts)+1):
-            sub_path = '/'.join(parts[:i]) + '/'
-            if not self.gcs_fs.exists(sub_path):
-                self.gcs_fs.touch(sub_path, **kwargs)
-            elif not exist_ok:
-                raise FileExistsError(f"Directory {sub_path} already exists.")
+        self._created_dirs.update('/'.join(parts[:i]) for i in range(1, len(parts) + 1))
+
+    def pipe(self, path, value=None, **kwargs):
+        """
+        Write one or many objects, resolving symlinks.
+
+        Parameters:
+            path (str or dict): The file path, or a dict of {path: bytes}.
+            value (bytes): The contents when `path` is a single path.
+
+        Returns:
+            None
+        """
+        if isinstance(path, str):
+            path = {path: value}
+        # gcsfs uploads a dict of objects concurrently, in chunks of batch_size
+        self.gcs_fs.pipe({self._resolve_path(p): v for p, v in path.items()}, **kwargs)
 
     def rm_file(self, path):
         """
@@ -212,8 +467,9 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
         Returns:
             None
         """
-        resolved_path = self._resolve_path(path)
+        resolved_path = self._resolve_path(path, revalidate=True)
         self.gcs_fs.rm(resolved_path)
+        self._forget_created_dirs(path, resolved_path)
 
     def rm_dir(self, path):
         """
@@ -225,8 +481,30 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
         Returns:
             None
         """
-        resolved_path = self._resolve_path(path)
+        resolved_path = self._resolve_path(path, revalidate=True)
         self.gcs_fs.rm(resolved_path, recursive=True)
+        self._forget_created_dirs(path, resolved_path)
+
+    def _forget_created_dirs(self, *paths):
+        """
+        Drop removed paths from the directories mkdirs() remembers creating.
+
+        The removed placeholder may have been the only object implying its
+        ancestors, so those are forgotten along with the path and everything
+        below it.
+
+        Parameters:
+            *paths (str): The removed paths, as given and as resolved.
+
+        Returns:
+            None
+        """
+        for path in {p.rstrip('/') for p in paths}:
+            parts = path.split('/')
+            ancestors = {'/'.join(parts[:i]) for i in range(1, len(parts) + 1)}
+            self._created_dirs = {
+                d for d in self._created_dirs if d not in ancestors and not d.startswith(path + '/')
+            }
 
     def symlink(self, source, target):
         """
@@ -241,6 +519,39 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
         """
         with self.gcs_fs.open(self._symlink_path(source), 'w') as f:
             f.write(target)
+        # Generation unknown until the next revalidation, which re-reads once
+        self.symlink_cache.put(source.rstrip('/'), target)
+        self._update_manifest(source, target)
+
+    def _update_manifest(self, path, target):
+        """
+        Record a new symlink, or with target None a removed one, in the c.py
+        manifest covering `path`, if there is one.
+
+        Manifests key symlinks by object name and store targets as object
+        names, while paths here start with the bucket and targets may be
+        relative to the symlink's directory.
+        """
+        path = path.strip('/')
+        key = path.split('/', 1)[1] if '/' in path else ''
+        covering = [p for p in self.manifest_prefixes if key.startswith(p + '/')]
+        if not covering:
+            return
+        if self._manifest_handler is None:
+            # google-cloud-storage is only needed once a manifest is written
+            from c import GCSSymlinkHandler
+            self._manifest_handler = GCSSymlinkHandler(self.bucket)
+
+        prefix = max(covering, key=len)
+        if target is None:
+            self._manifest_handler.update_manifest(prefix, remove_symlinks=[key], create=False)
+            return
+        if not target.startswith('/'):
+            target = os.path.normpath(os.path.join(os.path.dirname(path), target))
+        target = target.strip('/')
+        # A target of just the bucket links to the bucket root
+        target_key = target.split('/', 1)[1] if '/' in target else ''
+        self._manifest_handler.update_manifest(prefix, set_symlinks={key: target_key}, create=False)
 
     def unlink(self, path):
         """
@@ -253,8 +564,11 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
             None
         """
         symlink_blob = self._symlink_path(path)
-        if self.gcs_fs.exists(symlink_blob):
+        # Another client may have created or removed the symlink since it was cached
+        if self._lookup_symlink(path, revalidate=True) is not None:
             self.gcs_fs.rm(symlink_blob)
+            self.symlink_cache.put(path.rstrip('/'), None)
+            self._update_manifest(path, None)
         else:
             self.gcs_fs.rm(path)
 
@@ -268,10 +582,10 @@ class GCSSymlinkFileSystem(AbstractFileSystem):
         Returns:
             str: The target path.
         """
-        if self._is_symlink(path):
-            return self._read_symlink(path)
-        else:
+        target = self._lookup_symlink(path)
+        if target is None:
             raise ValueError(f"Path {path} is not a symlink.")
+        return target
 
     # Implement other necessary abstract methods or delegate to gcs_fs as needed.
     # For simplicity, many methods can be directly delegated to the underlying gcs_fs.
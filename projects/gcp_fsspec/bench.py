@@ -0,0 +1,164 @@
+import argparse
+import time
+
+from async_fs import AsyncGCSSymlinkFileSystem
+from b import GCSSymlinkFileSystem
+from c import GCSSymlinkHandler
+from fake_gcs import AsyncLatencyFileSystem, FakeClient, LatencyMemoryFileSystem, RoundTripCounter
+
+BUCKET = "bench"
+DATA_DIR = "export/data"
+
+
+def deep_dir(depth):
+    """Relative directory `depth` levels below a version directory."""
+    return "/".join(f"l{i}" for i in range(1, depth + 1))
+
+
+def populate_fs(fs, depth, num_files, chain):
+    """Layout for the fsspec backends; symlink targets are relative, as b.py expects."""
+    version_dir = f"{BUCKET}/{DATA_DIR}/SZ.version12"
+    for i in range(num_files):
+        fs.pipe_file(f"{version_dir}/{deep_dir(depth)}/data{i}.txt", f"data{i}".encode())
+    fs.pipe_file(f"{BUCKET}/{DATA_DIR}/SZ.prod.symlink", b"SZ.version12")
+    fs.pipe_file(f"{BUCKET}/{DATA_DIR}/latest.txt.symlink", f"SZ.version12/{deep_dir(depth)}/data0.txt".encode())
+    # link0 -> link1 -> ... -> latest.txt
+    for i in range(chain):
+        target = f"link{i + 1}" if i + 1 < chain else "latest.txt"
+        fs.pipe_file(f"{BUCKET}/{DATA_DIR}/link{i}.symlink", target.encode())
+
+
+def populate_bucket(client, depth, num_files):
+    """Layout for GCSSymlinkHandler; symlink targets are bucket paths, as c.py expects."""
+    bucket = client.bucket(BUCKET)
+    for i in range(num_files):
+        bucket._put(f"{DATA_DIR}/SZ.version12/{deep_dir(depth)}/data{i}.txt", f"data{i}".encode())
+    bucket._put(f"{DATA_DIR}/SZ.prod.symlink", f"{DATA_DIR}/SZ.version12".encode())
+
+
+def measure(counter, fn):
+    counter.reset()
+    start = time.perf_counter()
+    fn()
+    return counter.total, (time.perf_counter() - start) * 1e3
+
+
+def fs_operations(depth, num_files, chain):
+    counter = RoundTripCounter()
+    backend = LatencyMemoryFileSystem(counter)
+    populate_fs(backend, depth, num_files, chain)
+
+    def new_fs():
+        return GCSSymlinkFileSystem(BUCKET, gcs_fs=backend, skip_instance_cache=True)
+
+    def read(fs):
+        with fs.open(f"{BUCKET}/{DATA_DIR}/latest.txt") as f:
+            f.read()
+
+    return counter, new_fs, {
+        "open": read,
+        "ls": lambda fs: fs.ls(f"{BUCKET}/{DATA_DIR}/SZ.prod"),
+        "exists": lambda fs: fs.exists(f"{BUCKET}/{DATA_DIR}/latest.txt"),
+        f"resolve chain={chain}": lambda fs: fs._resolve_path(f"{BUCKET}/{DATA_DIR}/link0"),
+    }
+
+
+def async_fs_operations(depth, num_files, chain):
+    counter = RoundTripCounter()
+    backend = LatencyMemoryFileSystem(counter)
+    populate_fs(backend, depth, num_files, chain)
+    async_backend = AsyncLatencyFileSystem(backend)
+    paths = [f"{BUCKET}/{DATA_DIR}/SZ.prod/{deep_dir(depth)}/data{i}.txt" for i in range(num_files)]
+
+    def new_fs():
+        return AsyncGCSSymlinkFileSystem(BUCKET, gcs_fs=async_backend, skip_instance_cache=True)
+
+    return counter, new_fs, {
+        f"cat x{num_files}": lambda fs: fs.cat(paths),
+        "ls": lambda fs: fs.ls(f"{BUCKET}/{DATA_DIR}/SZ.prod"),
+        "exists": lambda fs: fs.exists(paths[0]),
+        f"resolve depth={depth}": lambda fs: fs.info(paths[0]),
+    }
+
+
+def handler_operations(depth, num_files, chain):
+    counter = RoundTripCounter()
+    client = FakeClient(counter)
+    populate_bucket(client, depth, num_files)
+    path = f"{DATA_DIR}/SZ.prod/{deep_dir(depth)}/data0.txt"
+
+    def new_handler():
+        return GCSSymlinkHandler(BUCKET, client=client)
+
+    def read_with_manifest(handler):
+        if not handler._manifests:
+            handler.use_manifest(DATA_DIR)
+        handler.read(path)
+
+    # The manifest is built once, outside of any measurement
+    new_handler().build_manifest(DATA_DIR)
+
+    return counter, new_handler, {
+        "read": lambda h: h.read(path),
+        "ls": lambda h: h.ls(f"{DATA_DIR}/SZ.prod/{deep_dir(depth)}"),
+        f"resolve depth={depth}": lambda h: h._resolve_symlink_path(path),
+        "read (manifest)": read_with_manifest,
+    }
+
+
+BACKENDS = {
+    "fs": fs_operations,
+    "async_fs": async_fs_operations,
+    "handler": handler_operations,
+}
+
+HEADER = (
+    f"{'backend':<9} {'operation':<18} {'cold trips':>10} {'cold ms':>9} "
+    f"{'warm trips':>10} {'warm ms':>9}"
+)
+
+
+def run_benchmark(backends, latency, depth, num_files, chain):
+    results = []
+    for name in backends:
+        counter, new_instance, operations = BACKENDS[name](depth, num_files, chain)
+        counter.latency = latency
+        for operation, fn in operations.items():
+            # Cold: a fresh instance with empty caches; warm: the same call again
+            instance = new_instance()
+            cold_trips, cold_ms = measure(counter, lambda: fn(instance))
+            warm_trips, warm_ms = measure(counter, lambda: fn(instance))
+            result = {
+                "backend": name,
+                "operation": operation,
+                "cold_trips": cold_trips,
+                "cold_ms": cold_ms,
+                "warm_trips": warm_trips,
+                "warm_ms": warm_ms,
+            }
+            results.append(result)
+            print(
+                f"{name:<9} {operation:<18} {cold_trips:>10} {cold_ms:>9.1f} "
+                f"{warm_trips:>10} {warm_ms:>9.1f}",
+                flush=True,
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count GCS round trips of the symlink filesystems against an in-memory fake"
+    )
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Delay added to every request")
+    parser.add_argument("--depth", type=int, default=6, help="Directory levels below the symlink")
+    parser.add_argument("--files", type=int, default=100, help="Files in the version directory")
+    parser.add_argument("--chain", type=int, default=3, help="Length of the symlink chain to resolve")
+    args = parser.parse_args()
+
+    print(HEADER)
+    run_benchmark(args.backends, args.latency_ms / 1e3, args.depth, args.files, args.chain)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,136 @@
 import sys
+import io
 import os
+import json
+import time
+import uuid
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from loguru import logger
 
+from google.api_core.exceptions import NotFound, NotModified, PreconditionFailed, RequestRangeNotSatisfiable
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
 
 warnings.filterwarnings(
     "ignore", message="Your application has authenticated using end user credentials"
 )
 
+# Requests sent in one batch; the JSON API accepts at most 100
+MAX_BATCH_SIZE = 100
+
+# Seconds an entry in the symlink index is trusted before it is looked up again
+SYMLINK_INDEX_TTL = 60.0
+
+# Objects larger than one chunk are fetched as parallel ranged requests
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+DEFAULT_READ_WORKERS = 8
+DEFAULT_WRITE_WORKERS = 8
+
+# GCS compose accepts at most this many source objects
+MAX_COMPOSE_COMPONENTS = 32
+
+# Objects requested per page when listing
+LIST_PAGE_SIZE = 1000
+
+# Per-prefix object recording every symlink under the prefix and its target
+MANIFEST_NAME = ".symlinks.json"
+MANIFEST_VERSION = 1
+# Seconds a manifest is trusted before a conditional GET revalidates it
+MANIFEST_TTL = 5.0
+
 # add color to loguru
 logger.add(
     sys.stderr, colorize=True, format="<green>{time}</green> <level>{message}</level>"
 )
 
 
+class _RangeWriter:
+    """File-like sink that places a ranged download at its offset in the target."""
+
+    def __init__(self, write_at, offset):
+        self._write_at = write_at
+        self._offset = offset
+
+    def write(self, data):
+        self._write_at(self._offset, data)
+        self._offset += len(data)
+        return len(data)
+
+
+class SymlinkManifest:
+    """
+    Local copy of the manifest object at `<prefix>/.symlinks.json`.
+
+    `generation` is the GCS generation of the manifest object, which changes
+    with every write, so it doubles as the manifest version and as the
+    precondition for conditional GETs and cutovers.
+    """
+
+    def __init__(self, prefix, ttl=MANIFEST_TTL):
+        self.prefix = prefix.rstrip("/")
+        self.ttl = ttl
+        self.symlinks = {}
+        self.generation = None
+        self.checked_at = None
+        # False while no manifest object exists; the prefix then falls back
+        # to the per-object `.symlink` index
+        self.present = False
+
+    @property
+    def blob_name(self):
+        return f"{self.prefix}/{MANIFEST_NAME}"
+
+    def covers(self, path):
+        return path.startswith(self.prefix + "/")
+
+
+class _MemoryviewReader(io.RawIOBase):
+    """
+    Seekable, read-only file object over a memoryview that never copies it.
+    """
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:n] = self._view[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
 class GCSSymlinkHandler:
-    def __init__(self, bucket_name):
-        self.client = storage.Client()
+    def __init__(self, bucket_name, symlink_index_ttl=SYMLINK_INDEX_TTL, manifest_prefixes=(), client=None):
+        # `client` replaces storage.Client(), e.g. with fake_gcs.FakeClient
+        self.client = client if client is not None else storage.Client()
         self.bucket = self.client.bucket(bucket_name)
-        self._symlink_cache = {}  # Cache to prevent infinite recursion
+        self.symlink_index_ttl = symlink_index_ttl
+        # prefix -> SymlinkManifest for prefixes resolved from a manifest
+        self._manifests = {}
+        for prefix in manifest_prefixes:
+            self.use_manifest(prefix)
+        # path -> (symlink blob or None, expiry); None means "not a symlink"
+        self._symlink_index = {}
+        # path -> (generation, target) so a target is downloaded once per generation
+        self._symlink_targets = {}
 
     def _is_symlink(self, blob_name):
         return blob_name.endswith(".symlink")
@@ -29,58 +139,329 @@ class GCSSymlinkHandler:
         content = symlink_blob.download_as_text().strip()
         return content
 
+    def _read_symlink(self, path, symlink_blob):
+        """
+        Target of the symlink at `path`, or None if it no longer exists.
+
+        Listed and indexed blobs are pinned to the generation they were seen
+        with, which is gone once the symlink is overwritten; the live object
+        is read instead and replaces the stale blob in the index.
+        """
+        cached = self._symlink_targets.get(path)
+        if cached is not None and cached[0] == symlink_blob.generation:
+            return cached[1]
+        try:
+            target = self._get_symlink_target(symlink_blob)
+        except NotFound:
+            symlink_blob = self.bucket.blob(symlink_blob.name)
+            try:
+                target = self._get_symlink_target(symlink_blob)
+            except NotFound:
+                self._symlink_index.pop(path, None)
+                return None
+            if path in self._symlink_index:
+                self._symlink_index[path] = (symlink_blob, self._symlink_index[path][1])
+        self._symlink_targets[path] = (symlink_blob.generation, target)
+        return target
+
+    def _index_symlinks(self, paths):
+        """
+        Look up `<path>.symlink` for all paths in one batch request.
+
+        Each candidate is a metadata GET, and the GETs go out together in a
+        single batch, so the cost is one round trip however deep the path is
+        and however many objects the bucket holds. A prefix listing with a
+        match_glob would page through every object under the shallowest
+        candidate instead.
+        """
+        found = {}
+        for start in range(0, len(paths), MAX_BATCH_SIZE):
+            chunk = paths[start : start + MAX_BATCH_SIZE]
+            blobs = [self.bucket.blob(f"{p}.symlink") for p in chunk]
+            # Missing objects are 404s in the batch; their blobs stay unloaded
+            with self.client.batch(raise_exception=False):
+                for blob in blobs:
+                    blob.reload()
+            for p, blob in zip(chunk, blobs):
+                if blob.generation is not None:
+                    found[p] = blob
+
+        expires_at = time.monotonic() + self.symlink_index_ttl
+        for p in paths:
+            self._symlink_index[p] = (found.get(p), expires_at)
+
+    def _lookup_symlinks(self, paths):
+        now = time.monotonic()
+        stale = [
+            p for p in paths
+            if p not in self._symlink_index or self._symlink_index[p][1] <= now
+        ]
+        if stale:
+            self._index_symlinks(stale)
+        return [self._symlink_index[p][0] for p in paths]
+
+    def invalidate_symlink_index(self):
+        self._symlink_index = {}
+
     def _resolve_symlink_path(self, path):
         """
-        Recursively resolve symlinks in the path, handling symlinks at any level.
+        Resolve symlinks in the path, handling symlinks at any level.
+
+        Every prefix of the path is checked in one batched lookup against the
+        symlink index, so resolution costs one batch request per symlink
+        followed instead of one request per path component. Prefixes covered
+        by a manifest (see use_manifest) are resolved locally instead.
         """
-        # Prevent infinite recursion
-        if path in self._symlink_cache:
+        if not path:
             return path
 
-        # Split the path into components
+        seen = set()
         parts = path.split("/")
-        resolved_parts = []
+        checked = set()
+        while True:
+            candidates = ["/".join(parts[: i + 1]) for i in range(len(parts))]
+            for manifest in self._manifests.values():
+                if manifest.prefix not in checked and any(manifest.covers(c) for c in candidates):
+                    self._refresh_manifest(manifest)
+                    checked.add(manifest.prefix)
+            manifests = {c: self._manifest_for(c) for c in candidates}
+
+            # Only prefixes no manifest covers go to the symlink index
+            uncovered = [c for c in candidates if manifests[c] is None]
+            symlink_blobs = dict(zip(uncovered, self._lookup_symlinks(uncovered))) if uncovered else {}
+
+            # The shallowest symlink wins; anything below it is rewritten
+            for i, current_path in enumerate(candidates):
+                if manifests[current_path] is not None:
+                    target = manifests[current_path].symlinks.get(current_path)
+                elif symlink_blobs[current_path] is not None:
+                    target = self._read_symlink(current_path, symlink_blobs[current_path])
+                else:
+                    target = None
+                if target is not None:
+                    break
+            else:
+                return "/".join(parts)
 
-        for i, part in enumerate(parts):
-            # Construct the current path being checked
-            current_path = "/".join(resolved_parts + [part])
+            if current_path in seen:
+                raise RecursionError(f"Circular symlink detected at {current_path}")
+            seen.add(current_path)
 
-            # Check if the current path is a symlink
-            symlink_blob = self.bucket.blob(f"{current_path}.symlink")
+            # Replace the prefix with the target and resolve the new path again
+            parts = target.split("/") + parts[i + 1 :]
 
-            if symlink_blob.exists():
-                # Resolve the symlink
-                target = self._get_symlink_target(symlink_blob)
+    def _manifest_for(self, path):
+        # The deepest existing manifest containing the path is authoritative
+        covering = [m for m in self._manifests.values() if m.present and m.covers(path)]
+        return max(covering, key=lambda m: len(m.prefix), default=None)
 
-                # Update the cache to prevent infinite recursion
-                self._symlink_cache[current_path] = target
+    def use_manifest(self, prefix, ttl=MANIFEST_TTL):
+        """
+        Resolve symlinks under `prefix` from its manifest object.
+
+        The manifest is downloaded once; afterwards it is revalidated at most
+        every `ttl` seconds with a single GET conditional on its generation,
+        which returns 304 without a body while nothing changed. Within the
+        TTL lookups cost no request, but a cutover by another writer may go
+        unseen for up to `ttl` seconds; ttl=0 sees it at once for the price
+        of one request per resolution. While the manifest object doesn't
+        exist, the prefix is resolved from the `.symlink` objects instead.
+        """
+        manifest = SymlinkManifest(prefix, ttl)
+        self._manifests[manifest.prefix] = manifest
+        self._refresh_manifest(manifest)
+        return manifest
+
+    def _refresh_manifest(self, manifest):
+        now = time.monotonic()
+        if manifest.checked_at is not None and now - manifest.checked_at < manifest.ttl:
+            return
+        blob = self.bucket.blob(manifest.blob_name)
+        try:
+            if manifest.generation is None:
+                data = blob.download_as_bytes()
+            else:
+                data = blob.download_as_bytes(if_generation_not_match=manifest.generation)
+        except NotModified:
+            pass
+        except NotFound:
+            manifest.symlinks = {}
+            manifest.generation = None
+            manifest.present = False
+        else:
+            manifest.symlinks = json.loads(data)["symlinks"]
+            manifest.generation = blob.generation
+            manifest.present = True
+            logger.info(f"Loaded manifest {manifest.blob_name} generation {manifest.generation}")
+        manifest.checked_at = now
 
-                # If this is the last part, return the full resolved path
-                if i == len(parts) - 1:
-                    return target
+    def update_manifest(self, prefix, set_symlinks=None, remove_symlinks=(), create=True):
+        """
+        Atomically add, retarget or remove symlinks in the manifest of `prefix`.
 
-                # Otherwise, replace the current part with the symlink target
-                # and continue resolving the rest of the path
-                resolved_parts = target.split("/")
+        Read-modify-write conditional on the generation that was read, retried
+        when another writer got in first. Readers see either the old or the
+        new manifest as a whole, so a cutover touching several links is atomic.
+        With create=False nothing is written when the prefix has no manifest,
+        and None is returned.
+        """
+        manifest = self._manifests.get(prefix.rstrip("/")) or SymlinkManifest(prefix)
+        while True:
+            blob = self.bucket.get_blob(manifest.blob_name)
+            if blob is None:
+                if not create:
+                    return None
+                symlinks, generation = {}, 0  # 0: only succeed if it still doesn't exist
             else:
-                resolved_parts.append(part)
-
-        return "/".join(resolved_parts)
+                generation = blob.generation
+                try:
+                    symlinks = json.loads(blob.download_as_bytes(if_generation_match=generation))["symlinks"]
+                except (PreconditionFailed, NotFound):
+                    logger.info(f"Manifest {manifest.blob_name} changed concurrently, retrying")
+                    continue
+
+            for path, target in (set_symlinks or {}).items():
+                if not manifest.covers(path):
+                    raise ValueError(f"{path} is outside manifest prefix {manifest.prefix}")
+                symlinks[path] = target
+            for path in remove_symlinks:
+                symlinks.pop(path, None)
+
+            body = json.dumps({"version": MANIFEST_VERSION, "symlinks": symlinks}, indent=1, sort_keys=True)
+            new_blob = self.bucket.blob(manifest.blob_name)
+            try:
+                new_blob.upload_from_string(body, content_type="application/json", if_generation_match=generation)
+            except PreconditionFailed:
+                logger.info(f"Manifest {manifest.blob_name} changed concurrently, retrying")
+                continue
+
+            manifest.symlinks = symlinks
+            manifest.generation = new_blob.generation
+            manifest.checked_at = time.monotonic()
+            manifest.present = True
+            return manifest
+
+    def build_manifest(self, prefix):
+        """
+        Materialize the manifest of `prefix` from the existing `.symlink` objects.
+        """
+        prefix = prefix.rstrip("/")
+        symlinks = {
+            blob.name[: -len(".symlink")]: self._get_symlink_target(blob)
+            for blob in self.client.list_blobs(self.bucket, prefix=prefix + "/", match_glob="**.symlink")
+        }
+        return self.update_manifest(prefix, set_symlinks=symlinks)
 
     def read(self, path):
         """
         Read the content of the object at the given path, resolving symlinks.
-        """
-        # Clear cache for each new read operation
-        self._symlink_cache = {}
 
+        The first DEFAULT_CHUNK_SIZE bytes are downloaded straight away, so
+        small objects take a single request. Only larger objects are stat'ed
+        for their size, and the rest is fetched as parallel ranged requests
+        pinned to the generation of the first chunk.
+        """
         resolved_path = self._resolve_symlink_path(path)
-        blob = self.bucket.blob(resolved_path)
-
-        if not blob.exists():
+        while True:
+            blob = self.bucket.blob(resolved_path)
+            try:
+                # One byte past the threshold tells whether there is more
+                head = blob.download_as_bytes(start=0, end=DEFAULT_CHUNK_SIZE)
+            except RequestRangeNotSatisfiable:
+                return b""  # Empty object
+            except NotFound:
+                raise FileNotFoundError(f"Object {resolved_path} does not exist.")
+            if len(head) <= DEFAULT_CHUNK_SIZE:
+                return head
+
+            sized = self.bucket.get_blob(resolved_path, generation=blob.generation)
+            if sized is None:
+                logger.info(f"{resolved_path} was overwritten while being read, retrying")
+                continue
+            buffer = bytearray(sized.size)
+            buffer[: len(head)] = head
+            self._download_ranges(sized, self._buffer_target(buffer), start=len(head))
+            return bytes(buffer)
+
+    def _stat(self, path):
+        resolved_path = self._resolve_symlink_path(path)
+        blob = self.bucket.get_blob(resolved_path)
+        if blob is None:
             raise FileNotFoundError(f"Object {resolved_path} does not exist.")
+        return blob
+
+    def _buffer_target(self, buffer):
+        view = memoryview(buffer).cast("B")
+
+        def write_at(offset, data):
+            view[offset : offset + len(data)] = data
 
-        return blob.download_as_bytes()
+        return buffer, write_at
+
+    def _download_ranges(
+        self, blob, target, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_READ_WORKERS, start=0
+    ):
+        """
+        Fetch `blob` from offset `start` as parallel ranged requests, each written in place.
+
+        Every range is pinned to the generation seen when the object was
+        stat'ed, so an overwrite during the download can't mix two versions.
+        """
+        result, write_at = target
+        ranges = [
+            (offset, min(offset + chunk_size, blob.size) - 1)
+            for offset in range(start, blob.size, chunk_size)
+        ]
+
+        def fetch(byte_range):
+            start, end = byte_range
+            # A Blob per range: download_to_file updates the blob's properties
+            ranged_blob = self.bucket.blob(blob.name, generation=blob.generation)
+            ranged_blob.download_to_file(_RangeWriter(write_at, start), start=start, end=end)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # list() re-raises the first failed range
+            list(pool.map(fetch, ranges))
+        logger.info(f"Read {blob.name}: {blob.size} bytes in {len(ranges)} ranges")
+        return result
+
+    def read_into(self, path, buffer=None, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_READ_WORKERS):
+        """
+        Read an object into a preallocated buffer with parallel ranged requests.
+
+        `buffer` is any writable buffer of at least the object size, e.g. a
+        bytearray, numpy array or mmap; one of the right size is allocated
+        when omitted. Returns the buffer.
+        """
+        blob = self._stat(path)
+        if buffer is None:
+            buffer = bytearray(blob.size)
+        elif memoryview(buffer).nbytes < blob.size:
+            raise ValueError(f"Buffer holds {memoryview(buffer).nbytes} bytes, object has {blob.size}")
+        return self._download_ranges(blob, self._buffer_target(buffer), chunk_size, max_workers)
+
+    def download(self, path, filename, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_READ_WORKERS):
+        """
+        Download an object to a local file with parallel ranged requests.
+
+        The file is sized up front and every range is written with pwrite()
+        at its own offset, so nothing is buffered beyond the chunks in flight.
+        """
+        blob = self._stat(path)
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, blob.size)
+
+            def write_at(offset, data):
+                while data:
+                    written = os.pwrite(fd, data, offset)
+                    data = memoryview(data)[written:]
+                    offset += written
+
+            self._download_ranges(blob, (filename, write_at), chunk_size, max_workers)
+        finally:
+            os.close(fd)
+        return filename
 
     def write_symlink(self, symlink_path, target_path):
         """
@@ -88,6 +469,14 @@ class GCSSymlinkHandler:
         """
         symlink_blob = self.bucket.blob(f"{symlink_path}.symlink")
         symlink_blob.upload_from_string(target_path)
+        expires_at = time.monotonic() + self.symlink_index_ttl
+        self._symlink_index[symlink_path] = (symlink_blob, expires_at)
+        self._symlink_targets[symlink_path] = (symlink_blob.generation, target_path)
+        # Manifest readers switch over when the manifest is rewritten
+        covering = [m for m in self._manifests.values() if m.covers(symlink_path)]
+        if covering:
+            manifest = max(covering, key=lambda m: len(m.prefix))
+            self.update_manifest(manifest.prefix, set_symlinks={symlink_path: target_path}, create=False)
         print(f"Symlink created: {symlink_path} -> {target_path}")
 
     def write(self, path, data, is_symlink=False, target_path=None):
@@ -99,57 +488,144 @@ class GCSSymlinkHandler:
                 raise ValueError("Target path must be provided for symlinks.")
             self.write_symlink(path, target_path)
         else:
-            blob = self.bucket.blob(path)
-            blob.upload_from_string(data)
+            self._upload(path, data)
             print(f"Data written to {path}")
 
-    def ls(self, path):
+    def _upload(self, path, data, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_WRITE_WORKERS):
+        if isinstance(data, str):
+            data = data.encode()
+        if len(data) <= chunk_size:
+            self.bucket.blob(path).upload_from_string(data)
+        else:
+            self._composite_upload(path, data, chunk_size, max_workers)
+
+    def _composite_upload(self, path, data, chunk_size, max_workers):
         """
-        List objects in the given path, resolving symlinks.
+        Upload `data` as parallel parts and compose them into one object.
+
+        The parts are temporary objects under a prefix unique to this upload,
+        so concurrent writers of the same path cannot collide, and they are
+        deleted once the composed object exists. Parts are streamed straight
+        from `data` without copying it.
+        """
+        view = memoryview(data).cast("B")
+        n_parts = min(MAX_COMPOSE_COMPONENTS, -(-len(view) // chunk_size))
+        part_size = -(-len(view) // n_parts)
+        part_prefix = f"{path}.parts-{uuid.uuid4().hex}"
+        parts = [
+            (self.bucket.blob(f"{part_prefix}/{i:02d}"), view[i * part_size : (i + 1) * part_size])
+            for i in range(n_parts)
+        ]
+
+        def upload(part):
+            blob, chunk = part
+            blob.upload_from_file(_MemoryviewReader(chunk), size=len(chunk))
+
+        try:
+            if max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    list(pool.map(upload, parts))
+            else:
+                for part in parts:
+                    upload(part)
+            self.bucket.blob(path).compose([blob for blob, _ in parts])
+        finally:
+            with self.client.batch(raise_exception=False):
+                for blob, _ in parts:
+                    blob.delete()
+        logger.info(f"Composed {path} from {n_parts} parts")
+
+    def write_many(self, items, max_workers=DEFAULT_WRITE_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Upload many objects concurrently.
+
+        `items` maps object paths to str/bytes. Objects larger than
+        `chunk_size` are uploaded as composite objects. At most `max_workers`
+        uploads run at once, counting the parts of composite objects. Returns
+        the number of objects written; the first failed upload is re-raised.
         """
-        # Clear cache for each new ls operation
-        self._symlink_cache = {}
+        # Split the worker budget between objects and the parts of each object
+        workers = max(1, min(max_workers, len(items)))
+        part_workers = max(1, max_workers // workers)
+
+        def upload(item):
+            path, data = item
+            self._upload(path, data, chunk_size, part_workers)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(upload, items.items()))
+        logger.info(f"Wrote {len(items)} objects")
+        return len(items)
 
-        # Resolve the path first
+    def upload_file(self, path, filename, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_WRITE_WORKERS):
+        """
+        Upload a local file, as a parallel multipart upload when it is large.
+        """
+        blob = self.bucket.blob(path)
+        if os.path.getsize(filename) <= chunk_size:
+            blob.upload_from_filename(filename)
+        else:
+            transfer_manager.upload_chunks_concurrently(
+                filename, blob, chunk_size=chunk_size, worker_type=transfer_manager.THREAD, max_workers=max_workers
+            )
+        logger.info(f"Uploaded {filename} to {path}")
+
+    def iter_ls(self, path, page_size=LIST_PAGE_SIZE, max_workers=DEFAULT_READ_WORKERS):
+        """
+        Yield the entries of a directory as the listing pages arrive.
+
+        One paginated pass with a delimiter returns files and subdirectories
+        together. Files are yielded as they are seen, subdirectories end in
+        "/", and symlinks come out as "name -> target" once their targets
+        have been downloaded on a thread pool. At most a few pages of work
+        are held at a time, so memory stays flat for any directory size.
+        """
         resolved_path = self._resolve_symlink_path(path.rstrip("/"))
         logger.info(f"Resolved path: {resolved_path}")
         prefix = resolved_path + "/" if resolved_path else ""
-        logger.info(f"Prefix: {prefix}")
-
-        items = []
 
-        # Check for direct symlinks in the directory
-        blobs = list(self.client.list_blobs(self.bucket, prefix=path.rstrip("/") + "/", delimiter="/"))
-        symlink_blobs = [blob for blob in blobs if self._is_symlink(blob.name)]
-
-        for symlink_blob in symlink_blobs:
-            # Extract the symlink name without the .symlink extension
-            symlink_name = os.path.basename(symlink_blob.name)[:-8]  # Remove '.symlink'
-            target = self._get_symlink_target(symlink_blob)
-            items.append(f"{symlink_name} -> {target}")
-
-        # List blobs and prefixes in the resolved path
-        blobs = list(self.client.list_blobs(self.bucket, prefix=prefix, delimiter="/"))
-        prefixes = list(
-            self.client.list_blobs(self.bucket, prefix=prefix, delimiter="/").prefixes
-        )
-
-        # Add subdirectories
-        for p in prefixes:
-            relative_name = os.path.relpath(p, prefix).rstrip("/")
-            if "/" not in relative_name:
-                items.append(relative_name + "/")
-
-        # Add files
-        for blob in blobs:
-            name = blob.name
-            if self._is_symlink(name):
-                continue  # Skip symlink files in listing
-
-            relative_name = os.path.relpath(name, prefix)
-            if "/" not in relative_name:
-                items.append(relative_name)
+        # (name, future) of symlink targets being downloaded, in listing order
+        pending = deque()
+        max_pending = 4 * max_workers
+
+        def symlink_entry(symlink_name, target):
+            # None when the symlink was deleted after it was listed
+            if target.result() is not None:
+                yield f"{symlink_name} -> {target.result()}"
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            blobs = self.client.list_blobs(self.bucket, prefix=prefix, delimiter="/", page_size=page_size)
+            for page in blobs.pages:
+                for p in sorted(page.prefixes):
+                    yield p[len(prefix):]
+
+                for blob in page:
+                    name = blob.name[len(prefix):]
+                    if not name:
+                        continue  # Directory placeholder object
+                    if not self._is_symlink(name):
+                        yield name
+                        continue
+
+                    symlink_path = blob.name[: -len(".symlink")]
+                    pending.append((name[: -len(".symlink")], pool.submit(self._read_symlink, symlink_path, blob)))
+                    if len(pending) >= max_pending:
+                        yield from symlink_entry(*pending.popleft())
+
+                # Hand out finished symlinks without waiting for the listing to end
+                while pending and pending[0][1].done():
+                    yield from symlink_entry(*pending.popleft())
+
+            while pending:
+                yield from symlink_entry(*pending.popleft())
 
+    def ls(self, path):
+        """
+        List objects in the given path, resolving symlinks.
+        """
+        items = list(self.iter_ls(path))
+        # Symlinks first, then subdirectories, then files
+        items.sort(key=lambda item: 0 if " -> " in item else 1 if item.endswith("/") else 2)
         logger.info(f"Items: {items}")
         return items
 
@@ -0,0 +1,224 @@
+import contextlib
+import fcntl
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+# Per-key locks are striped over this many lock files, so they never pile up
+LOCK_STRIPES = 256
+
+
+class MappedFile(io.RawIOBase):
+    """Read-only file object over a memory-mapped cache entry."""
+
+    def __init__(self, buffer, name=None):
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        # Past the end after a seek there is nothing left to read
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        else:
+            pos = len(self._view) + offset
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self._pos = pos
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    @property
+    def size(self):
+        return len(self._view)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            if isinstance(self._buffer, mmap.mmap):
+                self._buffer.close()
+        super().close()
+
+
+class DiskCache:
+    """
+    Node-local, content-addressed cache of object bytes, shared by processes.
+
+    Entries are keyed by an arbitrary string, e.g. "<resolved path>#<generation>",
+    and stored under the SHA-256 of the key. Keys must include the object
+    version: a new generation is a new key, so entries never go stale; old
+    ones just age out.
+
+    Concurrency between processes relies only on the filesystem: an entry is
+    written to a temp file and renamed into place, so readers see all of it
+    or nothing; a flock() per key makes concurrent misses fetch once; and a
+    running total of the entry sizes is kept under its own lock, deleting
+    least recently used entries once it exceeds `max_bytes`. Readers that
+    already mapped an evicted entry keep their pages until they unmap it.
+    """
+
+    def __init__(self, root, max_bytes=10 * 1024**3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._objects = os.path.join(root, "objects")
+        self._tmp = os.path.join(root, "tmp")
+        self._locks = os.path.join(root, "locks")
+        # Running total of the entry sizes, kept up to date under evict.lock
+        self._total_path = os.path.join(root, "total")
+        for d in (self._objects, self._tmp, self._locks):
+            os.makedirs(d, exist_ok=True)
+
+    def _entry_path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self._objects, digest[:2], digest)
+
+    @contextlib.contextmanager
+    def _lock(self, name):
+        fd = os.open(os.path.join(self._locks, name), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _key_lock(self, key):
+        stripe = int(hashlib.sha256(key.encode()).hexdigest()[:8], 16) % LOCK_STRIPES
+        return self._lock(f"{stripe:03d}.lock")
+
+    def get(self, key):
+        """Return a MappedFile for a cached entry, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            size = os.fstat(fd).st_size
+            # mmap can't map an empty file
+            buffer = mmap.mmap(fd, size, access=mmap.ACCESS_READ) if size else b""
+        finally:
+            os.close(fd)
+        # Eviction is least recently *used*, not written
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return MappedFile(buffer, name=path)
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return a MappedFile for `key`, calling fetch(file) to fill it on a miss.
+
+        `fetch` writes the object into the binary file it is given. Concurrent
+        misses for the same key, in this or other processes, wait for the
+        first one instead of fetching again. A fetched entry is mapped before
+        it is published, so eviction can never take it away from the caller.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self._key_lock(key):
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            entry = self._write(key, fetch)
+        self._account(entry.size, keep=entry.name)
+        return entry
+
+    def put(self, key, data):
+        with self._write(key, lambda f: f.write(data)) as entry:
+            self._account(entry.size, keep=entry.name)
+
+    def _write(self, key, fetch):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "w+b") as f:
+                fetch(f)
+                f.flush()
+                size = os.fstat(f.fileno()).st_size
+                buffer = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+            os.rename(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+        return MappedFile(buffer, name=path)
+
+    def _entries(self):
+        for shard in os.scandir(self._objects):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    with contextlib.suppress(FileNotFoundError):
+                        stat = entry.stat()
+                        yield entry.path, stat.st_size, stat.st_mtime
+
+    def _read_total(self):
+        try:
+            with open(self._total_path) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_total(self, total):
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        with os.fdopen(fd, "w") as f:
+            f.write(str(total))
+        os.rename(tmp_path, self._total_path)
+
+    def _account(self, added, keep=None):
+        """
+        Add `added` bytes to the shared running total, evicting when it is over.
+
+        The total lives in a file next to the entries, so a write only scans
+        the cache when eviction is actually due, or the first time.
+        """
+        with self._lock("evict.lock"):
+            total = self._read_total()
+            total = self._evict(keep) if total is None else total + added
+            if total > self.max_bytes:
+                total = self._evict(keep)
+            self._write_total(total)
+
+    def _evict(self, keep=None):
+        # Caller holds evict.lock; returns the total size left
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+                total -= size
+        return total
+
+    def clear(self):
+        with self._lock("evict.lock"):
+            for path, _, _ in list(self._entries()):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+            self._write_total(0)
+
+    @property
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
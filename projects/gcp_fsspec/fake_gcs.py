@@ -0,0 +1,392 @@
+import asyncio
+import contextlib
+import itertools
+import re
+import threading
+import time
+from collections import Counter
+
+from fsspec.asyn import AsyncFileSystem
+from fsspec.implementations.memory import MemoryFileSystem
+from google.api_core.exceptions import NotFound, NotModified, PreconditionFailed
+
+
+class RoundTripCounter:
+    """
+    Counts simulated requests by kind and delays each one by `latency` seconds.
+
+    The sleep releases the GIL, so requests issued from a thread pool overlap
+    the way real HTTP requests do.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def request(self, kind):
+        with self._lock:
+            self.counts[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+
+class LatencyMemoryFileSystem(MemoryFileSystem):
+    """
+    In-memory stand-in for gcsfs.GCSFileSystem, for GCSSymlinkFileSystem(gcs_fs=...).
+
+    Each public call that would be a request against GCS goes through the
+    counter first. Unlike MemoryFileSystem the store is per instance.
+    """
+
+    cachable = False
+    protocol = "fakegcs"
+
+    def __init__(self, counter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.counter = counter or RoundTripCounter()
+        self.store = {}
+        self.pseudo_dirs = [""]
+        self._generations = itertools.count(1)
+        self._object_generations = {}
+
+    def _with_generation(self, entry):
+        # What GCS reports and what the symlink caches revalidate against
+        if entry["type"] == "file":
+            entry["generation"] = self._object_generations.get(entry["name"])
+        return entry
+
+    def info(self, path, **kwargs):
+        self.counter.request("info")
+        return self._with_generation(super().info(path, **kwargs))
+
+    def ls(self, path, detail=True, **kwargs):
+        self.counter.request("ls")
+        entries = super().ls(path, detail=detail, **kwargs)
+        if detail:
+            entries = [self._with_generation(entry) for entry in entries]
+        return entries
+
+    def find(self, path, maxdepth=None, withdirs=False, detail=False, **kwargs):
+        # One recursive listing, as gcsfs does it
+        self.counter.request("ls")
+        found = super().find(path, maxdepth=maxdepth, withdirs=withdirs, detail=detail, **kwargs)
+        if detail:
+            for name, entry in found.items():
+                if entry.get("type") == "file":
+                    entry["generation"] = self._object_generations.get(name)
+        return found
+
+    def exists(self, path, **kwargs):
+        self.counter.request("exists")
+        try:
+            MemoryFileSystem.info(self, path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def cat_file(self, path, start=None, end=None, **kwargs):
+        self.counter.request("cat")
+        return super().cat_file(path, start=start, end=end, **kwargs)
+
+    def rm_file(self, path):
+        self.counter.request("delete")
+        super().rm_file(path)
+
+    def _open(self, path, mode="rb", **kwargs):
+        # pipe_file and touch write through here too
+        self.counter.request("open" if "r" in mode else "write")
+        f = super()._open(path, mode=mode, **kwargs)
+        if "r" not in mode:
+            self._object_generations[self._strip_protocol(path)] = next(self._generations)
+        return f
+
+
+class AsyncLatencyFileSystem(AsyncFileSystem):
+    """
+    Asynchronous in-memory backend for AsyncGCSSymlinkFileSystem(gcs_fs=...).
+
+    Requests sleep on the event loop, so thousands can be in flight at once.
+    """
+
+    cachable = False
+
+    def __init__(self, fs=None, asynchronous=False, loop=None, **kwargs):
+        super().__init__(asynchronous=asynchronous, loop=loop, **kwargs)
+        self.fs = fs or LatencyMemoryFileSystem(RoundTripCounter())
+        self.counter = self.fs.counter
+
+    async def _request(self, kind):
+        self.counter.counts[kind] += 1
+        if self.counter.latency:
+            await asyncio.sleep(self.counter.latency)
+
+    async def _info(self, path, **kwargs):
+        await self._request("info")
+        return self.fs._with_generation(MemoryFileSystem.info(self.fs, path))
+
+    async def _cat_file(self, path, start=None, end=None, **kwargs):
+        await self._request("cat")
+        return MemoryFileSystem.cat_file(self.fs, path, start=start, end=end)
+
+    async def _ls(self, path, detail=True, **kwargs):
+        await self._request("ls")
+        entries = MemoryFileSystem.ls(self.fs, path, detail=detail)
+        if detail:
+            entries = [self.fs._with_generation(entry) for entry in entries]
+        return entries
+
+    async def _exists(self, path, **kwargs):
+        await self._request("exists")
+        try:
+            MemoryFileSystem.info(self.fs, path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+def _glob_to_regex(pattern):
+    """Translate a GCS match_glob pattern (*, **, ?, [..], {a,b}) to a regex."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.index("]", i)
+            out.append(pattern[i : end + 1])
+            i = end
+        elif c == "{":
+            out.append("(?:")
+        elif c == "}":
+            out.append(")")
+        elif c == ",":
+            out.append("|")
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+class _FakePage(list):
+    def __init__(self, blobs, prefixes):
+        super().__init__(blobs)
+        self.prefixes = frozenset(prefixes)
+
+
+class _FakeBlobIterator:
+    """Like the HTTPIterator returned by Client.list_blobs: one request per page."""
+
+    def __init__(self, client, bucket, names, prefix, delimiter, page_size, pattern=None):
+        self._client = client
+        self._bucket = bucket
+        self._names = names
+        self._prefix = prefix
+        self._delimiter = delimiter
+        self._page_size = page_size
+        # GCS pages over every prefix match and applies match_glob within each
+        # page, so a selective glob under a broad prefix still costs every page
+        self._pattern = pattern
+        self.prefixes = set()
+
+    @property
+    def pages(self):
+        entries = []
+        seen_prefixes = set()
+        for name in self._names:
+            rest = name[len(self._prefix) :]
+            if self._delimiter and self._delimiter in rest:
+                sub = self._prefix + rest[: rest.index(self._delimiter) + 1]
+                if sub not in seen_prefixes:
+                    seen_prefixes.add(sub)
+                    entries.append((None, sub))
+            else:
+                entries.append((name, None))
+
+        for start in range(0, max(len(entries), 1), self._page_size):
+            self._client.counter.request("list")
+            chunk = entries[start : start + self._page_size]
+            prefixes = [p for _, p in chunk if p is not None]
+            self.prefixes.update(prefixes)
+            names = [n for n, _ in chunk if n is not None and (self._pattern is None or self._pattern.match(n))]
+            yield _FakePage([self._bucket._loaded_blob(n) for n in names], prefixes)
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class FakeBlob:
+    """The subset of google.cloud.storage.Blob that c.py uses."""
+
+    def __init__(self, name, bucket, generation=None):
+        self.name = name
+        self.bucket = bucket
+        self._pinned_generation = generation
+        # Like the real Blob, metadata is only known once fetched
+        self.generation = generation
+        self.size = None
+
+    @property
+    def _counter(self):
+        return self.bucket.client.counter
+
+    def _load(self, if_generation_match=None, if_generation_not_match=None):
+        stored = self.bucket._objects.get(self.name)
+        if stored is None or (self._pinned_generation and stored[1] != self._pinned_generation):
+            raise NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        data, generation = stored
+        if if_generation_match is not None and generation != if_generation_match:
+            raise PreconditionFailed(f"Generation {generation} != {if_generation_match}")
+        if if_generation_not_match is not None and generation == if_generation_not_match:
+            raise NotModified(f"Generation {generation} unchanged")
+        self.generation, self.size = generation, len(data)
+        return data
+
+    def exists(self):
+        self._counter.request("info")
+        return self.name in self.bucket._objects
+
+    def reload(self):
+        client = self.bucket.client
+        if not client._in_batch:
+            self._counter.request("info")
+        try:
+            self._load()
+        except NotFound as error:
+            if not client._in_batch:
+                raise
+            # Like delete(), a failed reload in a batch is reported when it is sent
+            client._batch_errors.append(error)
+            return
+        # The real Blob sends its loaded generation with every later download
+        self._pinned_generation = self.generation
+
+    def download_as_bytes(self, start=None, end=None, if_generation_match=None, if_generation_not_match=None, **kwargs):
+        self._counter.request("download")
+        data = self._load(if_generation_match, if_generation_not_match)
+        # `end` is inclusive, as in the real client
+        return data[start or 0 : None if end is None else end + 1]
+
+    def download_as_text(self, **kwargs):
+        return self.download_as_bytes(**kwargs).decode()
+
+    def download_to_file(self, file_obj, start=None, end=None, **kwargs):
+        file_obj.write(self.download_as_bytes(start=start, end=end, **kwargs))
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None, **kwargs):
+        self._counter.request("upload")
+        if isinstance(data, str):
+            data = data.encode()
+        self.bucket._put(self.name, bytes(data), if_generation_match)
+        self.generation, self.size = self.bucket._objects[self.name][1], len(data)
+
+    def upload_from_file(self, file_obj, size=None, **kwargs):
+        self.upload_from_string(file_obj.read() if size is None else file_obj.read(size), **kwargs)
+
+    def upload_from_filename(self, filename, **kwargs):
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read(), **kwargs)
+
+    def compose(self, sources, **kwargs):
+        self._counter.request("compose")
+        data = b"".join(self.bucket._objects[s.name][0] for s in sources)
+        self.bucket._put(self.name, data)
+        self.generation, self.size = self.bucket._objects[self.name][1], len(data)
+
+    def delete(self):
+        client = self.bucket.client
+        if not client._in_batch:
+            self._counter.request("delete")
+        if self.bucket._objects.pop(self.name, None) is None:
+            error = NotFound(f"No such object: {self.bucket.name}/{self.name}")
+            if not client._in_batch:
+                raise error
+            # A batch reports failures when it is sent, if at all
+            client._batch_errors.append(error)
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        # name -> (data, generation)
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def _put(self, name, data, if_generation_match=None):
+        with self._lock:
+            current = self._objects.get(name, (None, 0))[1]
+            if if_generation_match is not None and current != if_generation_match:
+                raise PreconditionFailed(f"Generation {current} != {if_generation_match}")
+            self._objects[name] = (data, next(self.client._generations))
+
+    def blob(self, name, generation=None, **kwargs):
+        return FakeBlob(name, self, generation)
+
+    def _loaded_blob(self, name):
+        # Listed and fetched blobs carry their generation, which pins their downloads
+        blob = FakeBlob(name, self, generation=self._objects[name][1])
+        blob.size = len(self._objects[name][0])
+        return blob
+
+    def get_blob(self, name, generation=None, **kwargs):
+        self.client.counter.request("info")
+        if name not in self._objects or generation not in (None, self._objects[name][1]):
+            return None
+        return self._loaded_blob(name)
+
+
+class FakeClient:
+    """
+    In-memory stand-in for google.cloud.storage.Client, for GCSSymlinkHandler(client=...).
+
+    Objects live in per-bucket dicts with GCS-style generations, so
+    conditional requests, compose and paginated, delimited and
+    match_glob-filtered listings behave as they do against the service.
+    """
+
+    def __init__(self, counter=None):
+        self.counter = counter or RoundTripCounter()
+        self._buckets = {}
+        self._generations = itertools.count(1)
+        self._in_batch = False
+        self._batch_errors = []
+
+    def bucket(self, name):
+        return self._buckets.setdefault(name, FakeBucket(self, name))
+
+    def list_blobs(self, bucket, prefix="", delimiter=None, match_glob=None, page_size=1000, **kwargs):
+        if isinstance(bucket, str):
+            bucket = self.bucket(bucket)
+        pattern = _glob_to_regex(match_glob) if match_glob else None
+        names = sorted(n for n in list(bucket._objects) if n.startswith(prefix or ""))
+        return _FakeBlobIterator(self, bucket, names, prefix or "", delimiter, page_size, pattern)
+
+    @contextlib.contextmanager
+    def batch(self, raise_exception=True):
+        # Everything inside goes out as a single batch request
+        self._in_batch = True
+        self._batch_errors = []
+        try:
+            yield
+        finally:
+            self._in_batch = False
+            self.counter.request("batch")
+        if raise_exception and self._batch_errors:
+            raise self._batch_errors[0]
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from b import GCSSymlinkFileSystem
+from c import GCSSymlinkHandler
+from fake_gcs import FakeClient, LatencyMemoryFileSystem, RoundTripCounter
+
+
+@pytest.fixture
+def counter():
+    return RoundTripCounter()
+
+
+@pytest.fixture
+def backend(counter):
+    backend = LatencyMemoryFileSystem(counter)
+    backend.pipe_file("bk/data/v1/a/file.txt", b"one")
+    backend.pipe_file("bk/data/v2/a/file.txt", b"two")
+    backend.pipe_file("bk/data/current.symlink", b"v1")
+    return backend
+
+
+def make_fs(backend, **kwargs):
+    return GCSSymlinkFileSystem("bk", gcs_fs=backend, skip_instance_cache=True, **kwargs)
+
+
+def test_hot_resolution_costs_no_round_trips(backend, counter):
+    fs = make_fs(backend)
+    assert fs._resolve_path("bk/data/current/a/file.txt") == "bk/data/v1/a/file.txt"
+
+    # Symlinks and the components known not to be symlinks are both cached
+    counter.reset()
+    assert fs._resolve_path("bk/data/current/a/file.txt") == "bk/data/v1/a/file.txt"
+    assert fs._is_symlink("bk/data") is False
+    assert counter.total == 0
+
+
+def test_expired_entry_with_same_generation_costs_one_metadata_call(backend, counter):
+    fs = make_fs(backend, symlink_cache_ttl=0.05)
+    assert fs._lookup_symlink("bk/data/current") == "v1"
+    time.sleep(0.1)
+
+    counter.reset()
+    assert fs._lookup_symlink("bk/data/current") == "v1"
+    assert dict(counter.counts) == {"info": 1}
+    # Revalidation extended the entry
+    counter.reset()
+    assert fs._lookup_symlink("bk/data/current") == "v1"
+    assert counter.total == 0
+
+
+def test_retarget_is_picked_up_after_expiry(backend, counter):
+    fs = make_fs(backend, symlink_cache_ttl=0.05)
+    assert fs.cat("bk/data/current/a/file.txt") == b"one"
+
+    # Another client points the symlink elsewhere
+    backend.pipe_file("bk/data/current.symlink", b"v2")
+    time.sleep(0.1)
+    assert fs.cat("bk/data/current/a/file.txt") == b"two"
+
+
+def test_unlink_drops_the_cached_target(backend):
+    fs = make_fs(backend)
+    fs.symlink("bk/data/latest", "v2")
+    assert fs._resolve_path("bk/data/latest/a/file.txt") == "bk/data/v2/a/file.txt"
+
+    fs.unlink("bk/data/latest")
+    assert fs.symlink_cache.get("bk/data/latest")[0] is None
+    assert not backend.exists("bk/data/latest.symlink")
+    assert fs._resolve_path("bk/data/latest/a/file.txt") == "bk/data/latest/a/file.txt"
+
+
+def test_unlink_sees_symlinks_created_by_another_client(backend):
+    fs = make_fs(backend)
+    assert fs._is_symlink("bk/data/other") is False
+
+    make_fs(backend).symlink("bk/data/other", "v1")
+    fs.unlink("bk/data/other")
+    assert not backend.exists("bk/data/other.symlink")
+
+
+def test_symlink_to_bucket_root_updates_manifest(backend):
+    handler = GCSSymlinkHandler("bk", client=FakeClient())
+    handler.update_manifest("data", set_symlinks={})
+    fs = make_fs(backend, manifest_prefixes=["data"], manifest_handler=handler)
+
+    fs.symlink("bk/data/root", "/bk")
+    fs.symlink("bk/data/up", "../v1")
+    manifest = handler.update_manifest("data")
+    assert manifest.symlinks == {"data/root": "", "data/up": "v1"}
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import fake_gcs
+from c import GCSSymlinkHandler
+from fake_gcs import FakeClient, RoundTripCounter
+
+
+@pytest.fixture
+def counter():
+    return RoundTripCounter()
+
+
+@pytest.fixture
+def client(counter):
+    client = FakeClient(counter)
+    bucket = client.bucket("bk")
+    for version in ("v1", "v2"):
+        bucket.blob(f"data/{version}/file.txt").upload_from_string(version.encode())
+    return client
+
+
+def test_update_manifest_retries_and_merges_concurrent_writers(client, monkeypatch):
+    writer_a = GCSSymlinkHandler("bk", client=client)
+    writer_b = GCSSymlinkHandler("bk", client=client)
+    writer_a.update_manifest("data", set_symlinks={"data/base": "data/v1"})
+
+    upload = fake_gcs.FakeBlob.upload_from_string
+    raced = []
+
+    def racing_upload(blob, data, **kwargs):
+        # B commits between A's read and A's conditional write
+        if blob.name.endswith(".symlinks.json") and not raced:
+            raced.append(True)
+            writer_b.update_manifest("data", set_symlinks={"data/b": "data/v2"})
+        return upload(blob, data, **kwargs)
+
+    monkeypatch.setattr(fake_gcs.FakeBlob, "upload_from_string", racing_upload)
+    manifest = writer_a.update_manifest("data", set_symlinks={"data/a": "data/v1"})
+
+    expected = {"data/base": "data/v1", "data/a": "data/v1", "data/b": "data/v2"}
+    assert manifest.symlinks == expected
+    stored = json.loads(client.bucket("bk").blob("data/.symlinks.json").download_as_bytes())
+    assert stored["symlinks"] == expected
+
+
+def test_update_manifest_without_create_leaves_missing_manifest_alone(client):
+    handler = GCSSymlinkHandler("bk", client=client)
+    assert handler.update_manifest("data", set_symlinks={"data/a": "data/v1"}, create=False) is None
+    assert client.bucket("bk").get_blob("data/.symlinks.json") is None
+
+
+def test_manifest_refresh_is_a_conditional_get(client, counter):
+    writer = GCSSymlinkHandler("bk", client=client)
+    writer.update_manifest("data", set_symlinks={"data/current": "data/v1"})
+    reader = GCSSymlinkHandler("bk", client=client)
+    reader.use_manifest("data", ttl=0)
+    assert reader.read("data/current/file.txt") == b"v1"
+
+    # Unchanged: the download is answered with 304 and nothing is parsed
+    counter.reset()
+    assert reader._resolve_symlink_path("data/current/file.txt") == "data/v1/file.txt"
+    assert dict(counter.counts) == {"download": 1}
+
+    writer.update_manifest("data", set_symlinks={"data/current": "data/v2"})
+    assert reader.read("data/current/file.txt") == b"v2"
+
+
+def test_deleted_manifest_falls_back_to_symlink_objects(client):
+    writer = GCSSymlinkHandler("bk", client=client)
+    writer.write_symlink("data/current", "data/v2")
+    writer.update_manifest("data", set_symlinks={"data/current": "data/v1"})
+    reader = GCSSymlinkHandler("bk", client=client)
+    reader.use_manifest("data", ttl=0)
+    assert reader.read("data/current/file.txt") == b"v1"
+
+    client.bucket("bk").blob("data/.symlinks.json").delete()
+    assert reader.read("data/current/file.txt") == b"v2"
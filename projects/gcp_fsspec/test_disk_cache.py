@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from b import GCSSymlinkFileSystem
+from disk_cache import DiskCache
+from fake_gcs import LatencyMemoryFileSystem
+
+
+def _fetch_shared(root, log_path):
+    def fetch(f):
+        with open(log_path, "a") as log:
+            log.write(f"{os.getpid()}\n")
+        # Long enough for every other process to miss and queue on the lock
+        time.sleep(0.2)
+        f.write(b"payload")
+
+    with DiskCache(root).get_or_fetch("bk/obj#1", fetch) as entry:
+        return entry.read()
+
+
+def test_concurrent_misses_fetch_once(tmp_path):
+    root, log_path = str(tmp_path / "cache"), str(tmp_path / "fetches.log")
+    DiskCache(root)
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        results = pool.starmap(_fetch_shared, [(root, log_path)] * 4)
+
+    assert results == [b"payload"] * 4
+    with open(log_path) as log:
+        assert len(log.readlines()) == 1
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    cache.put("k0#1", b"0" * 100)
+    cache.put("k1#1", b"1" * 100)
+    # Make the use order unambiguous: k0 before k1
+    now = time.time()
+    os.utime(cache._entry_path("k0#1"), (now - 20, now - 20))
+    os.utime(cache._entry_path("k1#1"), (now - 10, now - 10))
+
+    with cache.get_or_fetch("k2#1", lambda f: f.write(b"2" * 100)) as entry:
+        assert entry.read() == b"2" * 100
+
+    assert cache.get("k0#1") is None
+    assert cache.get("k1#1").read() == b"1" * 100
+    assert cache.size <= 250
+
+
+def test_fetched_entry_outlives_eviction(tmp_path):
+    # Bigger than the whole cache: it is kept for the caller that fetched it
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    with cache.get_or_fetch("big#1", lambda f: f.write(b"x" * 100)) as entry:
+        assert entry.size == 100
+        assert entry.read() == b"x" * 100
+
+
+def test_read_after_seek_past_end(tmp_path):
+    backend = LatencyMemoryFileSystem()
+    backend.pipe_file("bk/data.bin", b"0123456789")
+    fs = GCSSymlinkFileSystem(
+        "bk", gcs_fs=backend, disk_cache=DiskCache(str(tmp_path)), skip_instance_cache=True
+    )
+
+    with fs.open("bk/data.bin", "rb") as f:
+        f.seek(20)
+        assert f.read() == b""
+        assert f.read(5) == b""
+        f.seek(-3, os.SEEK_END)
+        assert f.read() == b"789"
+        with pytest.raises(ValueError):
+            f.seek(-1)
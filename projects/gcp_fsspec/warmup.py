@@ -0,0 +1,116 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from b import GCSSymlinkFileSystem, _generation
+from disk_cache import DiskCache
+
+MAGIC_CHARS = set("*?[")
+
+
+def split_pattern(pattern):
+    """Split a glob into its literal directory prefix and the rest."""
+    parts = pattern.strip('/').split('/')
+    for i, part in enumerate(parts):
+        if MAGIC_CHARS & set(part):
+            return '/'.join(parts[:i]), '/'.join(parts[i:])
+    return '/'.join(parts), ''
+
+
+def expand(fs, pattern):
+    """
+    Resolve the symlinks a pattern goes through and yield (resolved path, generation).
+
+    The literal prefix is resolved first, then globbed on the backend.
+    Matches that are symlinks themselves are resolved to their targets.
+    Matched files and the directories between them and the prefix are
+    recorded as "not a symlink" in the symlink cache, from the listing of
+    their parent, so a snapshot covers them completely.
+    """
+    prefix, rest = split_pattern(pattern)
+    resolved_prefix = fs._resolve_path(prefix)
+    if not rest:
+        info = fs.gcs_fs.info(resolved_prefix)
+        if info['type'] == 'file':
+            yield resolved_prefix, _generation(info)
+        return
+
+    # Backends differ on a leading "/"; keep names in the form we resolve to
+    slash = '/' if resolved_prefix.startswith('/') else ''
+    matches = {
+        slash + name.lstrip('/'): info
+        for name, info in fs.gcs_fs.glob(f"{resolved_prefix}/{rest}", detail=True).items()
+        if info['type'] == 'file'
+    }
+
+    # Resolving a match looks up every component below the prefix too
+    components = set(matches)
+    for name in matches:
+        directory = os.path.dirname(name)
+        while len(directory) > len(resolved_prefix):
+            components.add(directory)
+            directory = os.path.dirname(directory)
+
+    for directory in {os.path.dirname(name) for name in components}:
+        siblings = {slash + name.lstrip('/') for name in fs.gcs_fs.ls(directory, detail=False)}
+        for name in components:
+            if os.path.dirname(name) == directory and f"{name}.symlink" not in siblings:
+                fs.symlink_cache.put(name, None)
+
+    for name, info in matches.items():
+        if name.endswith('.symlink'):
+            target = fs._resolve_path(name[:-len('.symlink')])
+            info = fs.gcs_fs.info(target)
+            if info['type'] == 'file':
+                yield target, _generation(info)
+        else:
+            yield name, _generation(info)
+
+
+def warmup(fs, patterns, max_workers=16):
+    """
+    Resolve, list and prefetch everything matched by `patterns` into fs.disk_cache.
+
+    Patterns are expanded concurrently, then every object is downloaded
+    with at most `max_workers` requests in flight. Returns the number of
+    objects and bytes that are now cached.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        expanded = pool.map(lambda pattern: list(expand(fs, pattern)), patterns)
+        objects = dict(obj for matches in expanded for obj in matches)
+        sizes = list(pool.map(lambda obj: fs.prefetch(*obj), objects.items()))
+    return len(objects), sum(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resolve symlinks and prefetch objects so a job can start without round trips"
+    )
+    parser.add_argument("patterns", nargs="+", help="Glob patterns, e.g. bucket/export/data/SZ.prod/**")
+    parser.add_argument("--bucket", required=True)
+    parser.add_argument("--cache-dir", required=True, help="Directory of the shared disk cache")
+    parser.add_argument("--max-bytes", type=int, default=10 * 1024**3, help="Disk cache size limit")
+    parser.add_argument("--snapshot", required=True, help="Where to write the resolution snapshot")
+    parser.add_argument("--ttl", type=float, default=3600.0, help="Seconds the snapshot stays valid")
+    parser.add_argument("--workers", type=int, default=16, help="Maximum concurrent requests")
+    args = parser.parse_args()
+
+    fs = GCSSymlinkFileSystem(
+        args.bucket, symlink_cache_ttl=args.ttl, disk_cache=DiskCache(args.cache_dir, args.max_bytes)
+    )
+    start = time.perf_counter()
+    count, nbytes = warmup(fs, args.patterns, args.workers)
+    fs.save_snapshot(args.snapshot)
+    print(
+        f"Prefetched {count} objects ({nbytes / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s, "
+        f"snapshot written to {args.snapshot}"
+    )
+    print(
+        "Load it at job start with "
+        f"GCSSymlinkFileSystem(..., disk_cache=DiskCache({args.cache_dir!r})).load_snapshot({args.snapshot!r})"
+    )
+
+
+if __name__ == "__main__":
+    main()